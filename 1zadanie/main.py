@@ -1,12 +1,97 @@
+import bisect
 import os
 import sys
-import re
-import csv
+from concurrent.futures import ThreadPoolExecutor
 from PyQt5 import QtWidgets, uic
+from PyQt5.QtCore import QAbstractTableModel, QFileSystemWatcher, QModelIndex, Qt, QTimer, pyqtSignal
 from PyQt5.QtGui import QColor
 
+from merge import ResultsMerger, find_files
+from results import ResultIndex, ResultStore, ResultsReader, natural_key
+from snapshot import load_snapshot, save_snapshot
+from stats import TaskStats
+
+# Цвета за места
+PODIUM_COLORS = {
+    1: QColor(255, 215, 0),      # золото
+    2: QColor(192, 192, 192),    # серебро
+    3: QColor(205, 127, 50),     # бронза
+}
+
+
+class ResultsModel(QAbstractTableModel):
+    """Модель поверх колонок ResultStore: Qt сам спрашивает только видимые строки."""
+
+    HEADERS = ["Логин", "ФИО", "Баллы"]
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.rows = []
+        self.places = {}
+
+    def set_rows(self, rows, podium):
+        """rows — номера строк store по убыванию баллов, podium — три лучших балла.
+
+        Список берётся из индекса без копирования, поэтому после index.update()
+        модель нужно заново заполнить через set_rows.
+        """
+        self.beginResetModel()
+        self.rows = rows
+        self.places = {score: place for place, score in enumerate(podium, 1)}
+        self.endResetModel()
+
+    def set_podium(self, podium):
+        """Обновляет цвета мест без перестройки таблицы."""
+        places = {score: place for place, score in enumerate(podium, 1)}
+        if places == self.places:
+            return
+        # Перекрасить нужно только верх таблицы: строки со старыми и новыми призовыми баллами
+        lowest = min(list(places) + list(self.places))
+        self.places = places
+        scores = self.store.score
+        count = bisect.bisect_right(self.rows, -lowest, key=lambda r: -scores[r])
+        if count:
+            self.dataChanged.emit(self.index(0, 0), self.index(count - 1, len(self.HEADERS) - 1),
+                                  [Qt.BackgroundRole])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        store = self.store
+        i = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            col = index.column()
+            if col == 0:
+                return store.strings[store.login[i]]
+            if col == 1:
+                return store.strings[store.name[i]]
+            return str(store.score[i])
+        if role == Qt.BackgroundRole:
+            return PODIUM_COLORS.get(self.places.get(store.score[i]))
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+
 class OlympiadViewer(QtWidgets.QWidget):
-    def __init__(self):
+    # (поколение данных, TaskStats или текст ошибки) — из потока подсчёта статистики
+    stats_ready = pyqtSignal(int, object)
+
+    def __init__(self, source=None, live=False):
+        """source — каталог или glob-шаблон с файлами туров/регионов, по умолчанию rez.csv.
+
+        live — следить за rez.csv и дочитывать дописанные строки во время тура.
+        """
         super().__init__()
         # путь до файлов
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -15,133 +100,300 @@ class OlympiadViewer(QtWidgets.QWidget):
 
         uic.loadUi(ui_path, self)
 
-        self.data = []
-        self.schools = set()
-        self.classes = set()
-        
-        self.load_data(csv_path)
+        self.store = ResultStore()
+        self.reader = ResultsReader(csv_path, live=live)
+        self.index = ResultIndex(self.store)
+        self.current_key = (None, None)
+        self.merger = None
+        self.watcher = None
+        self.live = live and not source
+        self.model = ResultsModel(self.store, self)
+        self.resultTable.setModel(self.model)
+        # Ширину колонок подбираем по первым строкам, а не по всем
+        self.resultTable.horizontalHeader().setResizeContentsPrecision(200)
 
         self.schoolComboBox.addItem("Все")
         self.classComboBox.addItem("Все")
 
-        # Сортировка
-        sorted_schools = sorted(self.schools, key=int)
-        sorted_classes = sorted(self.classes, key=int)
-
-        self.schoolComboBox.addItems(sorted_schools)
-        self.classComboBox.addItems(sorted_classes)
-
         self.schoolComboBox.currentTextChanged.connect(self.apply_filters)
         self.classComboBox.currentTextChanged.connect(self.apply_filters)
 
-        self.apply_filters()
+        # Статистика по задачам считается при первом открытии вкладки, в фоновом потоке
+        self.stats = None
+        self.stats_generation = 0
+        self.stats_pending = False
+        self.stats_pool = ThreadPoolExecutor(1)
+        self.stats_ready.connect(self.on_stats_ready)
+        self.groupComboBox.addItem("Школа", "school")
+        self.groupComboBox.addItem("Класс", "class")
+        self.groupComboBox.currentIndexChanged.connect(self.update_stats)
+        self.tabWidget.currentChanged.connect(self.update_stats)
+        # Для нескольких файлов задачи у туров разные — статистика только для rez.csv
+        self.tabWidget.setTabEnabled(self.tabWidget.indexOf(self.statsTab), not source)
+
+        if source:
+            self.load_merged(source)
+        elif self.load_cached():
+            pass
+        # Первая порция сразу, остальные — из цикла событий, когда окно уже открыто
+        elif self.open_data():
+            self.load_next_chunk()
 
-    def load_data(self, filename):
+    def load_cached(self):
+        """Тёплый старт: берём разобранные колонки и индекс из снимка рядом с CSV."""
         try:
-            with open(filename, newline='', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                headers = next(reader) 
-                try:
-                    score_index = headers.index("Score")
-                except ValueError:
-                    print("Ошибка: колонка 'Score' не найдена в CSV.")
-                    return
-
-                for row in reader:
-                    if len(row) < 5:
-                        continue
-                    name = row[1]
-                    login = row[2]
-                    score_str = row[score_index].strip()
-
-                    # Парсинг логина sh-kaluga16-09-11-1
-                    match = re.match(r"sh-kaluga16-(\d{2})-(\d{2})-\d+", login)
-                    if not match:
-                        continue
-
-                    school_str, class_str = match.groups() 
-                    try:
-                        score = int(score_str) if score_str.isdigit() else 0
-                    except:
-                        score = 0
-
-                    self.data.append({
-                        "login": login,
-                        "name": name,
-                        "school": school_str,
-                        "class": class_str,
-                        "score": score
-                    })
-                    self.schools.add(school_str)
-                    self.classes.add(class_str)
+            loaded = load_snapshot(self.reader, self.store, self.index)
+        except Exception as e:
+            print(f"Не удалось прочитать снимок: {e}")
+            self.reset_data()
+            loaded = False
+        if not loaded:
+            return False
+        self.reader.done = True
+        self.update_combos()
+        self.apply_filters()
+        self.start_live()
+        return True
+
+    def reset_data(self):
+        self.store = ResultStore()
+        self.index = ResultIndex(self.store)
+        self.model.store = self.store
+        self.invalidate_stats()
 
+    def open_data(self):
+        try:
+            self.reader.open()
+            return True
         except FileNotFoundError:
-            print(f"Файл не найден: {filename}")
+            print(f"Файл не найден: {self.reader.filename}")
+        except ValueError:
+            print("Ошибка: колонка 'Score' не найдена в CSV.")
         except Exception as e:
             print(f"Ошибка при загрузке данных: {e}")
+        self.apply_filters()
+        return False
 
-    def apply_filters(self):
-        selected_school = self.schoolComboBox.currentText()
-        selected_class = self.classComboBox.currentText()
+    def load_next_chunk(self):
+        failed = False
+        try:
+            self.reader.read_chunk(self.store)
+        except Exception as e:
+            print(f"Ошибка при загрузке данных: {e}")
+            self.reader.close()
+            failed = True
+
+        self.index.update()
+        self.update_combos()
+        self.apply_filters()
+
+        if not self.reader.done:
+            QTimer.singleShot(0, self.load_next_chunk)
+            return
+        if not failed:
+            try:
+                save_snapshot(self.reader, self.store, self.index)
+            except Exception as e:
+                print(f"Не удалось сохранить снимок: {e}")
+        self.start_live()
+
+    def start_live(self):
+        if not self.live:
+            return
+        if self.watcher is None:
+            self.watcher = QFileSystemWatcher([self.reader.filename], self)
+            self.watcher.fileChanged.connect(self.on_appended)
+        # Строки, дописанные пока шла загрузка (или перечитывание после reload_data)
+        self.on_appended()
+
+    def on_appended(self, path=None):
+        filename = self.reader.filename
+        if filename not in self.watcher.files() and os.path.exists(filename):
+            self.watcher.addPath(filename)
+        if not self.reader.done:
+            # Идёт перечитывание порциями: дописанное подхватит load_next_chunk,
+            # а read_appended прочитал бы те же строки второй раз
+            return
+        try:
+            if self.reader.truncated():
+                self.reload_data()
+                return
+            first, last = self.reader.read_appended(self.store)
+        except Exception as e:
+            print(f"Ошибка при чтении {filename}: {e}")
+            return
+        if first == last:
+            return
 
-        filtered = []
-        for entry in self.data:
-            school_ok = (selected_school == "Все") or (entry["school"] == selected_school)
-            class_ok = (selected_class == "Все") or (entry["class"] == selected_class)
-            if school_ok and class_ok:
-                filtered.append(entry)
+        # Новые строки вставляем в индекс и в видимую модель по одной, без сброса
+        inserted = []
 
-        # Сортировка по убыванию баллов
-        filtered.sort(key=lambda x: -x["score"])
+        def before_insert(key, pos):
+            if key == self.current_key and self.index.rows[key] is self.model.rows:
+                if inserted:
+                    self.model.endInsertRows()
+                self.model.beginInsertRows(QModelIndex(), pos, pos)
+                inserted.append(pos)
 
-        # Определение призёров
-        if not filtered:
-            self.update_table([])
+        self.invalidate_stats()
+        self.index.insert_new(before_insert)
+        if inserted:
+            self.model.endInsertRows()
+        key = self.current_key
+        if key in self.index.dirty or self.index.rows.get(key, self.model.rows) is not self.model.rows:
+            # Первые строки для выбранного фильтра — проще заполнить модель заново
+            self.update_combos()
+            self.apply_filters()
             return
+        _, podium = self.index.lookup(*self.current_key)
+        self.model.set_podium(podium)
+        self.update_combos()
+
+    def invalidate_stats(self):
+        # Результат подсчёта по старым данным придёт с прежним поколением и будет отброшен
+        self.stats = None
+        self.stats_generation += 1
+        # Если вкладка открыта — сразу пересчитать, иначе посчитаем при переходе на неё
+        self.update_stats()
 
-        unique_scores = sorted(set(e["score"] for e in filtered), reverse=True)
-        top3_scores = unique_scores[:3]
-
-        display_data = []
-        for entry in filtered:
-            if entry["score"] in top3_scores:
-                rank = top3_scores.index(entry["score"]) + 1
-            else:
-                rank = None
-            display_data.append((entry["login"], entry["name"], entry["score"], rank))
-
-        self.update_table(display_data)
-
-    def update_table(self, display_data):
-        table = self.resultTable
-        table.clearContents()
-        table.setRowCount(len(display_data))
-        table.setColumnCount(3)
-
-        for i, (login, name, score, rank) in enumerate(display_data):
-            table.setItem(i, 0, QtWidgets.QTableWidgetItem(login))
-            table.setItem(i, 1, QtWidgets.QTableWidgetItem(name))
-            table.setItem(i, 2, QtWidgets.QTableWidgetItem(str(score)))
-
-            # Цвета за места
-            if rank == 1:
-                color = QColor(255, 215, 0)      # золото
-            elif rank == 2:
-                color = QColor(192, 192, 192)    # серебро
-            elif rank == 3:
-                color = QColor(205, 127, 50)     # бронза
-            else:
-                color = None
-
-            if color:
-                for col in range(3):
-                    table.item(i, col).setBackground(color)
+    def on_stats_ready(self, generation, result):
+        self.stats_pending = False
+        if generation != self.stats_generation:
+            # Пока считали, данные изменились: один пересчёт вместо очереди устаревших
+            self.update_stats()
+            return
+        if isinstance(result, str):
+            print(f"Ошибка при подсчёте статистики: {result}")
+            return
+        self.stats = result
+        self.update_stats()
 
+    def compute_stats(self):
+        """Разбирает CSV по ячейкам в пуле, окно в это время не замирает."""
+        generation = self.stats_generation
+        self.stats_pending = True
+
+        def done(future):
+            # Вызывается в потоке пула, сигнал доставится в поток GUI через очередь
+            error = future.exception()
+            self.stats_ready.emit(generation, future.result() if error is None else str(error))
+
+        self.stats_pool.submit(TaskStats.from_csv, self.reader.filename).add_done_callback(done)
+
+    def update_stats(self):
+        if self.tabWidget.currentWidget() is not self.statsTab:
+            return
+        if self.stats is None:
+            if not self.stats_pending:
+                self.compute_stats()
+            return
+        summary = self.stats.group_by(self.groupComboBox.currentData())
+        table = self.statsTable
+        if summary is None:
+            table.setRowCount(0)
+            return
+
+        headers = ["Группа", "Участников", "Средний балл", "Медиана"]
+        for task in self.stats.tasks:
+            headers += [f"{task}: решили", f"{task}: попыток"]
+        bins = summary["bins"]
+        headers += [f"{bins[i]:.0f}–{bins[i + 1]:.0f}" for i in range(len(bins) - 1)]
+
+        table.clear()
+        table.setColumnCount(len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setRowCount(len(summary["group"]))
+        for i, group in enumerate(summary["group"]):
+            values = [group, summary["count"][i],
+                      f"{summary['mean'][i]:.1f}", f"{summary['median'][i]:.1f}"]
+            for rate, attempts in zip(summary["solve_rate"][i], summary["mean_attempts"][i]):
+                values += [f"{rate:.0%}", f"{attempts:.2f}"]
+            values += list(summary["hist"][i])
+            for j, val in enumerate(values):
+                table.setItem(i, j, QtWidgets.QTableWidgetItem(str(val)))
         table.resizeColumnsToContents()
 
+    def closeEvent(self, event):
+        self.stats_pool.shutdown(wait=False, cancel_futures=True)
+        super().closeEvent(event)
+
+    def reload_data(self):
+        """Файл перезаписан с начала — читаем его заново."""
+        self.reset_data()
+        self.reader = ResultsReader(self.reader.filename, live=True)
+        if self.open_data():
+            self.load_next_chunk()
+
+    def load_merged(self, source):
+        files = find_files(source)
+        if not files:
+            print(f"Файлы не найдены: {source}")
+        else:
+            self.merger = ResultsMerger(self.store)
+            try:
+                self.merger.load(files)
+            except Exception as e:
+                print(f"Ошибка при загрузке данных: {e}")
+            # При изменении файла пересчитываем только его участников
+            self.watcher = QFileSystemWatcher(files, self)
+            self.watcher.fileChanged.connect(self.on_file_changed)
+
+        self.index.update()
+        self.update_combos()
+        self.apply_filters()
+
+    def on_file_changed(self, path):
+        try:
+            changed, removed = self.merger.update_file(path)
+        except Exception as e:
+            print(f"Ошибка при загрузке {path}: {e}")
+            return
+        # Файл, заменённый целиком, watcher перестаёт отслеживать
+        if os.path.exists(path) and path not in self.watcher.files():
+            self.watcher.addPath(path)
+        if not changed and not removed and self.index.size == len(self.store):
+            return
+
+        self.index.discard(removed)
+        self.index.refresh(changed)
+        self.index.update()
+        self.update_combos()
+        self.apply_filters()
+
+    def update_combos(self):
+        """Перестраивает фильтры, если набор школ или классов изменился."""
+        for combo, values in ((self.schoolComboBox, self.store.schools),
+                              (self.classComboBox, self.store.classes)):
+            items = sorted(values, key=natural_key)
+            if [combo.itemText(i) for i in range(1, combo.count())] == items:
+                continue
+            current = combo.currentText()
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItem("Все")
+            combo.addItems(items)
+            combo.setCurrentText(current)
+            combo.blockSignals(False)
+
+    def apply_filters(self):
+        selected_school = self.schoolComboBox.currentText()
+        selected_class = self.classComboBox.currentText()
+
+        ids = self.store.strings.ids
+        # Номера строк школы/класса в таблице строк (-1 — такой нет)
+        school_id = None if selected_school == "Все" else ids.get(selected_school, -1)
+        class_id = None if selected_class == "Все" else ids.get(selected_class, -1)
+
+        # Строки уже отсортированы по убыванию баллов, пьедестал посчитан в индексе
+        self.current_key = (school_id, class_id)
+        rows, podium = self.index.lookup(school_id, class_id)
+        self.model.set_rows(rows, podium)
+        self.resultTable.resizeColumnsToContents()
+
 
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
-    window = OlympiadViewer()
+    args = [a for a in sys.argv[1:] if a != "--live"]
+    window = OlympiadViewer(args[0] if args else None, live="--live" in sys.argv)
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file
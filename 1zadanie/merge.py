@@ -0,0 +1,148 @@
+import csv
+import glob
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from results import natural_key
+
+# Логины вида sh-<регион>-SS-CC-N, например sh-kaluga16-09-11-1
+REGION_LOGIN_RE = re.compile(r"sh-([a-z]+\d*)-(\d{2})-(\d{2})-\d+")
+# Колонки задач: 1(Система счисления), 2(Количество символов), ...
+TASK_RE = re.compile(r"\d+\(.*\)$")
+SCORE_RE = re.compile(r"\d+")
+
+
+def find_files(source):
+    """Каталог (все *.csv в нём) или glob-шаблон -> отсортированный список файлов."""
+    if os.path.isdir(source):
+        source = os.path.join(source, "*.csv")
+    return sorted(glob.glob(source), key=natural_key)
+
+
+def parse_file(path):
+    """Разбирает один файл тура/региона.
+
+    Возвращает {login: (name, school, class, {задача: баллы})}. Школа
+    записывается вместе с регионом ("kaluga16-09"), чтобы школы с одинаковыми
+    номерами из разных регионов не смешивались.
+    """
+    parsed = {}
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        headers = next(reader, [])
+        name_index = headers.index("user_name") if "user_name" in headers else 1
+        login_index = headers.index("login") if "login" in headers else 2
+        tasks = [(i, h) for i, h in enumerate(headers) if TASK_RE.match(h)]
+        if not tasks and "Score" in headers:
+            tasks = [(headers.index("Score"), "Score")]
+
+        for row in reader:
+            if len(row) <= login_index:
+                continue
+            login = row[login_index]
+            m = REGION_LOGIN_RE.match(login)
+            if not m:
+                continue
+            region, school, cls = m.groups()
+            scores = {}
+            for i, task in tasks:
+                cell = SCORE_RE.match(row[i].strip()) if i < len(row) else None
+                scores[task] = int(cell.group()) if cell else 0
+            parsed[login] = (row[name_index], f"{region}-{school}", cls, scores)
+    return parsed
+
+
+class ResultsMerger:
+    """Сводит результаты нескольких файлов (туры, регионы) по логину в ResultStore.
+
+    Если задача встречается в нескольких файлах, берётся лучший балл за неё,
+    итог участника — сумма по задачам.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.files = {}
+        self.rows = {}
+        # Сколько участников в каждой школе/классе — чтобы убрать опустевшие из фильтров
+        self.counts = Counter()
+
+    def load(self, paths, workers=None):
+        """Параллельно разбирает файлы в пуле процессов. Возвращает (изменённые, удалённые) строки."""
+        paths = list(paths)
+        if len(paths) > 1:
+            with ProcessPoolExecutor(workers) as pool:
+                parsed = list(pool.map(parse_file, paths))
+        else:
+            parsed = [parse_file(p) for p in paths]
+        logins = set()
+        for path, results in zip(paths, parsed):
+            self.files[path] = results
+            logins.update(results)
+        return self.apply(logins)
+
+    def update_file(self, path):
+        """Перечитывает один изменившийся файл и пересчитывает только его участников."""
+        old = self.files.pop(path, {})
+        new = parse_file(path) if os.path.exists(path) else {}
+        if new:
+            self.files[path] = new
+        changed = {login for login in old.keys() | new.keys()
+                   if old.get(login) != new.get(login)}
+        return self.apply(changed)
+
+    def total(self, login):
+        name = school = cls = None
+        best = {}
+        for results in self.files.values():
+            entry = results.get(login)
+            if entry is None:
+                continue
+            name, school, cls, scores = entry
+            for task, score in scores.items():
+                if score > best.get(task, -1):
+                    best[task] = score
+        if name is None:
+            return None
+        return name, school, cls, sum(best.values())
+
+    def apply(self, logins):
+        """Переносит итоги логинов в store.
+
+        Новые участники дописываются в конец store (их подхватит
+        ResultIndex.update), для остальных возвращаются номера строк с
+        изменившимся баллом или ФИО и строки участников, пропавших из всех
+        файлов. Школы и классы, в которых никого не осталось, убираются из
+        store.schools / store.classes.
+        """
+        store = self.store
+        strings = store.strings
+        counts = self.counts
+        changed, removed = [], []
+        for login in logins:
+            total = self.total(login)
+            row = self.rows.get(login)
+            if total is None:
+                if row is not None:
+                    removed.append(self.rows.pop(login))
+                    school, cls = strings[store.school[row]], strings[store.cls[row]]
+                    counts[school, None] -= 1
+                    counts[None, cls] -= 1
+                    if not counts[school, None]:
+                        store.schools.discard(school)
+                    if not counts[None, cls]:
+                        store.classes.discard(cls)
+                continue
+            name, school, cls, score = total
+            if row is None:
+                self.rows[login] = store.append(login, name, school, cls, score)
+                counts[school, None] += 1
+                counts[None, cls] += 1
+                continue
+            name_id = strings.intern(name)
+            if store.score[row] != score or store.name[row] != name_id:
+                store.score[row] = score
+                store.name[row] = name_id
+                changed.append(row)
+        return changed, removed
@@ -0,0 +1,144 @@
+"""Пьедесталы по всем школам и классам без GUI.
+
+    python report.py [rez.csv | каталог | "glob*.csv"] -f csv|json|html -o out.csv
+
+Не импортирует PyQt5, поэтому запускается на сервере.
+"""
+import argparse
+import html
+import json
+import os
+import sys
+
+from merge import ResultsMerger, find_files
+from results import ResultIndex, ResultStore, ResultsReader, natural_key
+from snapshot import load_snapshot, save_snapshot
+
+
+def load_results(source):
+    """rez.csv (со снимком) или несколько файлов туров/регионов -> (store, index)."""
+    store = ResultStore()
+    index = ResultIndex(store)
+    files = [source] if os.path.isfile(source) else find_files(source)
+    if not files:
+        raise FileNotFoundError(f"Файлы не найдены: {source}")
+
+    if len(files) > 1:
+        ResultsMerger(store).load(files)
+        index.update()
+        return store, index
+
+    reader = ResultsReader(files[0])
+    try:
+        if load_snapshot(reader, store, index):
+            return store, index
+    except Exception as e:
+        # Снимок — только кеш: при любой ошибке разбираем CSV заново
+        print(f"Не удалось прочитать снимок: {e}", file=sys.stderr)
+        store = ResultStore()
+        index = ResultIndex(store)
+        reader = ResultsReader(files[0])
+    reader.open()
+    while not reader.done:
+        reader.read_chunk(store)
+    index.update()
+    try:
+        save_snapshot(reader, store, index)
+    except OSError as e:
+        print(f"Не удалось сохранить снимок: {e}", file=sys.stderr)
+    return store, index
+
+
+def leaderboards(store, index):
+    """(школа, класс, [(место или None, логин, ФИО, баллы), ...]) по всем парам школа-класс."""
+    s = store.strings
+    keys = [key for key in index.rows if key[0] is not None and key[1] is not None]
+    keys.sort(key=lambda key: (natural_key(s[key[0]]), natural_key(s[key[1]])))
+    for school, cls in keys:
+        rows, podium = index.lookup(school, cls)
+        places = {score: place for place, score in enumerate(podium, 1)}
+        yield s[school], s[cls], [
+            (places.get(store.score[i]), s[store.login[i]], s[store.name[i]], store.score[i])
+            for i in rows]
+
+
+def render_csv(group):
+    school, cls, rows = group
+    return "".join(f"{school},{cls},{place or ''},{login},{csv_quote(name)},{score}\n"
+                   for place, login, name, score in rows)
+
+
+def csv_quote(value):
+    if any(c in value for c in ',"\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def render_json(group):
+    school, cls, rows = group
+    return json.dumps({
+        "school": school,
+        "class": cls,
+        "rows": [{"place": place, "login": login, "name": name, "score": score}
+                 for place, login, name, score in rows],
+    }, ensure_ascii=False)
+
+
+def render_html(group):
+    school, cls, rows = group
+    cells = "".join(
+        f'<tr class="place{place or 0}"><td>{place or ""}</td><td>{html.escape(login)}</td>'
+        f"<td>{html.escape(name)}</td><td>{score}</td></tr>\n"
+        for place, login, name, score in rows)
+    return (f"<h2>Школа {html.escape(school)}, класс {html.escape(cls)}</h2>\n"
+            f"<table><tr><th>Место</th><th>Логин</th><th>ФИО</th><th>Баллы</th></tr>\n"
+            f"{cells}</table>\n")
+
+
+# формат: (начало файла, рендер группы, разделитель групп, конец файла)
+FORMATS = {
+    "csv": ("school,class,place,login,name,score\n", render_csv, "", ""),
+    "json": ("[\n", render_json, ",\n", "\n]\n"),
+    "html": ('<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Результаты олимпиады</title>\n'
+             "<style>.place1{background:#ffd700}.place2{background:#c0c0c0}"
+             ".place3{background:#cd7f32}</style></head><body>\n",
+             render_html, "", "</body></html>\n"),
+}
+
+
+def write_report(store, index, out, fmt="csv"):
+    """Пишет все таблицы за один проход: группа строится, форматируется и сразу уходит в out."""
+    head, render, sep, tail = FORMATS[fmt]
+    out.write(head)
+    for n, group in enumerate(leaderboards(store, index)):
+        if n:
+            out.write(sep)
+        out.write(render(group))
+    out.write(tail)
+
+
+def main(argv=None):
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Пьедесталы олимпиады по школам и классам")
+    parser.add_argument("source", nargs="?", default=os.path.join(script_dir, "rez.csv"),
+                        help="CSV, каталог или glob-шаблон с файлами туров")
+    parser.add_argument("-f", "--format", choices=sorted(FORMATS), default="csv")
+    parser.add_argument("-o", "--output", help="файл отчёта (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    try:
+        store, index = load_results(args.source)
+    except (OSError, ValueError) as e:
+        print(f"Ошибка при загрузке данных: {e}", file=sys.stderr)
+        return 1
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            write_report(store, index, out, args.format)
+    else:
+        write_report(store, index, sys.stdout, args.format)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
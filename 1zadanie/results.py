@@ -0,0 +1,256 @@
+import bisect
+import csv
+import os
+import re
+from array import array
+from itertools import islice
+
+# Парсинг логина sh-kaluga16-09-11-1 (компилируем один раз)
+LOGIN_RE = re.compile(r"sh-kaluga16-(\d{2})-(\d{2})-\d+")
+CHUNK_ROWS = 20000
+
+
+def natural_key(s):
+    """Ключ сортировки, при котором "kaluga16-9" идёт раньше "kaluga16-10"."""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", s)]
+
+
+class StringTable:
+    """Интернированные строки: каждая строка хранится один раз, в колонках лежит её номер."""
+
+    def __init__(self):
+        self.strings = []
+        self.ids = {}
+
+    def intern(self, s):
+        sid = self.ids.get(s)
+        if sid is None:
+            sid = len(self.strings)
+            self.ids[s] = sid
+            self.strings.append(s)
+        return sid
+
+    def __getitem__(self, sid):
+        return self.strings[sid]
+
+
+class ResultStore:
+    """Результаты в виде колонок-массивов вместо словаря на каждую строку."""
+
+    def __init__(self):
+        self.strings = StringTable()
+        self.login = array('I')
+        self.name = array('I')
+        self.school = array('I')
+        self.cls = array('I')
+        self.score = array('i')
+        self.schools = set()
+        self.classes = set()
+
+    def __len__(self):
+        return len(self.score)
+
+    def append(self, login, name, school, cls, score):
+        intern = self.strings.intern
+        self.login.append(intern(login))
+        self.name.append(intern(name))
+        self.school.append(intern(school))
+        self.cls.append(intern(cls))
+        self.score.append(score)
+        self.schools.add(school)
+        self.classes.add(cls)
+        return len(self.score) - 1
+
+    def row(self, i):
+        s = self.strings
+        return (s[self.login[i]], s[self.name[i]], s[self.school[i]],
+                s[self.cls[i]], self.score[i])
+
+
+def parse_rows(rows, score_index, store):
+    """Разбирает строки CSV и дописывает подходящие в store."""
+    match = LOGIN_RE.match
+    append = store.append
+    for row in rows:
+        if len(row) < 5 or len(row) <= score_index:
+            continue
+        login = row[2]
+        m = match(login)
+        if not m:
+            continue
+        score_str = row[score_index].strip()
+        score = int(score_str) if score_str.isdigit() else 0
+        append(login, row[1], m.group(1), m.group(2), score)
+
+
+class ResultsReader:
+    """Потоковое чтение rez.csv порциями по chunk_rows строк.
+
+    Файл читается в бинарном режиме, чтобы знать смещение (offset) уже
+    прочитанной части. В режиме live недописанная последняя строка не
+    читается — её дочитает read_appended.
+    """
+
+    def __init__(self, filename, chunk_rows=CHUNK_ROWS, live=False):
+        self.filename = filename
+        self.chunk_rows = chunk_rows
+        self.live = live
+        self.offset = 0
+        self.score_index = None
+        self.done = False
+        self._file = None
+
+    def open(self):
+        """Открывает файл и читает заголовок. Бросает ValueError, если нет колонки Score."""
+        self._file = open(self.filename, 'rb')
+        header = self._file.readline().decode('utf-8-sig')
+        self.offset = self._file.tell()
+        headers = next(csv.reader([header]), [])
+        try:
+            self.score_index = headers.index("Score")
+        except ValueError:
+            self.close()
+            raise
+
+    def read_chunk(self, store):
+        """Читает следующую порцию в store. Возвращает (first, last) — номера добавленных строк."""
+        first = len(store)
+        lines = list(islice(self._file, self.chunk_rows))
+        if lines and self.live and not lines[-1].endswith(b"\n"):
+            lines.pop()
+        if not lines:
+            self.close()
+            return first, first
+        self.offset += sum(map(len, lines))
+        parse_rows(csv.reader(line.decode('utf-8') for line in lines),
+                   self.score_index, store)
+        return first, len(store)
+
+    def truncated(self):
+        """Файл стал короче прочитанного — его перезаписали, дописывать нечего."""
+        return os.path.getsize(self.filename) < self.offset
+
+    def read_appended(self, store):
+        """Дочитывает строки, дописанные в файл после offset.
+
+        Как и read_chunk, недописанную последнюю строку берёт только не в режиме live.
+        """
+        first = len(store)
+        with open(self.filename, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1 if self.live else len(data)
+        if end:
+            self.offset += end
+            parse_rows(csv.reader(data[:end].decode('utf-8').splitlines()),
+                       self.score_index, store)
+        return first, len(store)
+
+    def close(self):
+        self.done = True
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ResultIndex:
+    """Номера строк по ключу (школа, класс), отсортированные по убыванию баллов.
+
+    Ключ — пара номеров из таблицы строк, None означает «Все». Порядок внутри
+    ключа и пьедестал (три лучших различных балла) считаются один раз и
+    пересчитываются только для ключей, в которые попали новые строки.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.rows = {}
+        self.podiums = {}
+        self.dirty = set()
+        self.size = 0
+
+    def update(self):
+        """Добавляет в индекс строки, появившиеся в store после прошлого вызова."""
+        store = self.store
+        rows = self.rows
+        dirty = self.dirty
+        for i in range(self.size, len(store)):
+            for key in self.keys(i):
+                lst = rows.get(key)
+                if lst is None:
+                    rows[key] = [i]
+                else:
+                    lst.append(i)
+                dirty.add(key)
+        self.size = len(store)
+
+    def insert_new(self, before_insert=None):
+        """Вставляет новые строки store сразу на своё место (для дописанных в live).
+
+        В отличие от update не требует пересортировки ключа. before_insert(key, pos)
+        вызывается перед каждой вставкой — чтобы модель успела сделать beginInsertRows.
+        """
+        store = self.store
+        scores = store.score
+        by_score = lambda r: -scores[r]
+        for i in range(self.size, len(store)):
+            score = scores[i]
+            for key in self.keys(i):
+                lst = self.rows.get(key)
+                if lst is None:
+                    lst = self.rows[key] = []
+                if key in self.dirty:
+                    lst.append(i)
+                    continue
+                pos = bisect.bisect_right(lst, -score, key=by_score)
+                if before_insert is not None:
+                    before_insert(key, pos)
+                lst.insert(pos, i)
+                podium = self.podiums.get(key)
+                if podium is not None and score not in podium and (
+                        len(podium) < 3 or score > podium[-1]):
+                    del self.podiums[key]
+        self.size = len(store)
+
+    def refresh(self, changed):
+        """Пересортировать только ключи строк, у которых изменились баллы."""
+        for i in changed:
+            self.dirty.update(self.keys(i))
+
+    def discard(self, removed):
+        """Убирает строки (участник пропал из всех файлов) из индекса."""
+        for i in removed:
+            for key in self.keys(i):
+                self.rows[key].remove(i)
+                self.podiums.pop(key, None)
+
+    def keys(self, i):
+        s, c = self.store.school[i], self.store.cls[i]
+        return (None, None), (s, None), (None, c), (s, c)
+
+    def lookup(self, school_id=None, class_id=None):
+        """Возвращает (номера строк по убыванию баллов, пьедестал) для фильтра."""
+        key = (school_id, class_id)
+        rows = self.rows.get(key)
+        if rows is None:
+            return [], ()
+        if key in self.dirty:
+            # sort стабильный и с reverse=True: при равных баллах порядок файла
+            rows.sort(key=self.store.score.__getitem__, reverse=True)
+            self.dirty.discard(key)
+            self.podiums.pop(key, None)
+        podium = self.podiums.get(key)
+        if podium is None:
+            podium = self.podiums[key] = top_scores(rows, self.store.score)
+        return rows, podium
+
+
+def top_scores(rows, scores, places=3):
+    """Первые places различных баллов из отсортированного по убыванию списка строк."""
+    top = []
+    for i in rows:
+        score = scores[i]
+        if not top or score != top[-1]:
+            if len(top) == places:
+                break
+            top.append(score)
+    return tuple(top)
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+from array import array
+
+# Снимок разобранного rez.csv: заголовок, JSON с метаданными, затем колонки подряд
+MAGIC = b"OLYSNAP1"
+HEADER = struct.Struct("<8sQ")
+COLUMNS = ("login", "name", "school", "cls", "score")
+
+
+def snapshot_path(filename):
+    return filename + ".snapshot"
+
+
+def file_key(filename, size):
+    """Длина и хеш первых size байт исходного файла — той части, что уже в снимке.
+
+    Дописанные после снимка строки ключ не меняют: их дочитает load_snapshot.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    with open(filename, 'rb') as f:
+        left = size
+        while left:
+            block = f.read(min(left, 1 << 20))
+            if not block:
+                break
+            h.update(block)
+            left -= len(block)
+    return {"size": size, "hash": h.hexdigest()}
+
+
+def save_snapshot(reader, store, index):
+    """Сохраняет колонки store и отсортированный индекс рядом с CSV."""
+    for key in list(index.dirty):
+        index.lookup(*key)
+
+    strings = "\0".join(store.strings.strings).encode('utf-8')
+    keys, index_rows = [], array('I')
+    for key, rows in index.rows.items():
+        keys.append([key[0], key[1], len(index_rows), len(rows), index.podiums.get(key)])
+        index_rows.extend(rows)
+
+    blobs = [strings] + [getattr(store, name).tobytes() for name in COLUMNS] + [index_rows.tobytes()]
+    meta = {
+        "source": file_key(reader.filename, reader.offset),
+        "score_index": reader.score_index,
+        "offset": reader.offset,
+        "strings": len(store.strings.strings),
+        "blobs": [len(b) for b in blobs],
+        "keys": keys,
+    }
+    meta_bytes = json.dumps(meta).encode('utf-8')
+
+    path = snapshot_path(reader.filename)
+    tmp = path + ".tmp"
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(meta_bytes)))
+        f.write(meta_bytes)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, path)
+
+
+def load_snapshot(reader, store, index):
+    """Заполняет store и index из снимка. False — снимка нет или CSV с тех пор изменился.
+
+    Если в CSV после снимка дописали строки, они дочитываются и попадают в индекс.
+    """
+    path = snapshot_path(reader.filename)
+    # Пустой или обрезанный до заголовка снимок (например, после сбоя) — читаем CSV
+    if not os.path.exists(path) or os.path.getsize(path) < HEADER.size:
+        return False
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        try:
+            magic, meta_len = HEADER.unpack_from(mm, 0)
+            if magic != MAGIC:
+                return False
+            pos = HEADER.size
+            meta = json.loads(mm[pos:pos + meta_len])
+            pos += meta_len
+            if pos + sum(meta["blobs"]) > len(mm):
+                return False
+
+            # Сначала дешёвая проверка размера, хеш прочитанной части — только если файл не короче
+            source = meta["source"]
+            size = os.path.getsize(reader.filename)
+            if size < source["size"] or size > source["size"] and not ends_line(reader.filename, source["size"]):
+                return False
+            if source != file_key(reader.filename, source["size"]):
+                return False
+        except (struct.error, ValueError, KeyError, TypeError):
+            return False
+
+        blobs = []
+        for length in meta["blobs"]:
+            blobs.append(mm[pos:pos + length])
+            pos += length
+
+    strings = blobs[0].decode('utf-8').split("\0") if meta["strings"] else []
+    store.strings.strings = strings
+    store.strings.ids = dict(zip(strings, range(len(strings))))
+    for name, blob in zip(COLUMNS, blobs[1:]):
+        getattr(store, name).frombytes(blob)
+    store.schools = {strings[i] for i in set(store.school)}
+    store.classes = {strings[i] for i in set(store.cls)}
+
+    index_rows = array('I')
+    index_rows.frombytes(blobs[-1])
+    for school, cls, start, length, podium in meta["keys"]:
+        key = (school, cls)
+        index.rows[key] = index_rows[start:start + length].tolist()
+        if podium is not None:
+            index.podiums[key] = tuple(podium)
+    index.size = len(store)
+
+    reader.score_index = meta["score_index"]
+    reader.offset = meta["offset"]
+    if reader.offset < size:
+        reader.read_appended(store)
+        index.update()
+    return True
+
+
+def ends_line(filename, offset):
+    """Снимок кончается на границе строки — дописанное можно читать как новые строки."""
+    if offset == 0:
+        return True
+    with open(filename, 'rb') as f:
+        f.seek(offset - 1)
+        return f.read(1) == b"\n"
@@ -0,0 +1,102 @@
+import csv
+import re
+
+import numpy as np
+
+from results import LOGIN_RE
+from merge import TASK_RE
+
+# Ячейка задачи: 100(+2) — сдана после двух неудачных попыток, -3 — три неудачные.
+# «+» означает лишь, что решение принято, баллы за него могут быть неполными: 0(+3), 70(+2)
+CELL_RE = re.compile(r"(\d*)\(\+(\d*)\)|-(\d+)")
+HIST_BINS = 5
+
+
+def parse_cell(cell):
+    """Ячейка задачи -> (баллы, попытки)."""
+    m = CELL_RE.search(cell)
+    if m is None:
+        digits = cell.strip()
+        return (int(digits) if digits.isdigit() else 0), 0
+    score, wrong, failed = m.groups()
+    if failed is not None:
+        return 0, int(failed)
+    return int(score or 0), int(wrong or 0) + 1
+
+
+class TaskStats:
+    """Баллы и попытки по задачам в массивах NumPy (строка — участник, колонка — задача)."""
+
+    def __init__(self, tasks, school, cls, scores, attempts, solved):
+        self.tasks = tasks
+        self.school = school
+        self.cls = cls
+        self.scores = scores
+        self.attempts = attempts
+        self.solved = solved
+        self.total = scores.sum(axis=1)
+
+    @classmethod
+    def from_csv(cls, filename):
+        with open(filename, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            headers = next(reader, [])
+            task_cols = [i for i, h in enumerate(headers) if TASK_RE.match(h)]
+            schools, classes, cells = [], [], []
+            match = LOGIN_RE.match
+            for row in reader:
+                if len(row) < 5:
+                    continue
+                m = match(row[2])
+                if not m:
+                    continue
+                schools.append(m.group(1))
+                classes.append(m.group(2))
+                cells.append([parse_cell(row[i]) if i < len(row) else (0, 0)
+                              for i in task_cols])
+
+        parsed = np.array(cells, dtype=np.int32).reshape(len(cells), len(task_cols), 2)
+        scores = parsed[:, :, 0]
+        # Решена — набран максимальный балл по задаче среди всех участников
+        solved = (scores == scores.max(axis=0, initial=0)) & (scores > 0)
+        return cls([headers[i] for i in task_cols],
+                   np.array(schools), np.array(classes),
+                   scores, parsed[:, :, 1], solved)
+
+    def group_by(self, by="school"):
+        """Сводка по школам или классам, посчитанная группировкой без циклов по участникам.
+
+        Возвращает словарь массивов: group, count, mean, median, solve_rate
+        (группа x задача), mean_attempts (группа x задача), hist (группа x корзина)
+        и bins — границы корзин гистограммы итоговых баллов. None, если данных нет.
+        """
+        if not len(self.total):
+            return None
+        keys = self.school if by == "school" else self.cls
+        groups, inverse = np.unique(keys, return_inverse=True)
+        n = len(groups)
+        count = np.bincount(inverse, minlength=n)
+        total = self.total
+
+        mean = np.bincount(inverse, weights=total, minlength=n) / count
+
+        # Сортируем по (группа, балл): каждая группа — непрерывный отрезок
+        order = np.lexsort((total, inverse))
+        starts = np.cumsum(count) - count
+        # Суммы по отрезкам сразу для всех задач
+        solve_rate = np.add.reduceat(self.solved[order], starts, axis=0, dtype=np.int64) / count[:, None]
+        mean_attempts = np.add.reduceat(self.attempts[order], starts, axis=0) / count[:, None]
+
+        # Медиана — середина отрезка
+        sorted_total = total[order]
+        median = (sorted_total[starts + (count - 1) // 2] +
+                  sorted_total[starts + count // 2]) / 2
+
+        bins = np.linspace(0, max(int(total.max(initial=0)), 1), HIST_BINS + 1)
+        bin_idx = np.clip(np.digitize(total, bins[1:-1]), 0, HIST_BINS - 1)
+        hist = np.bincount(inverse * HIST_BINS + bin_idx,
+                           minlength=n * HIST_BINS).reshape(n, HIST_BINS)
+
+        return {"group": groups, "count": count, "mean": mean, "median": median,
+                "solve_rate": solve_rate, "mean_attempts": mean_attempts,
+                "hist": hist, "bins": bins}
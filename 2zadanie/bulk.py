@@ -0,0 +1,145 @@
+"""Массовый импорт и экспорт фильмов для films_db.sqlite.
+
+    python bulk.py import films.csv        # или films.jsonl
+    python bulk.py export films.jsonl      # или films.csv
+
+Формат определяется по расширению: CSV с колонками title,year,duration,genre
+или JSON Lines с теми же ключами. Жанр задаётся названием, неизвестные
+жанры создаются.
+"""
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+import time
+from itertools import islice
+
+DB_PATH = "films_db.sqlite"
+BATCH_SIZE = 10000
+FIELDS = ["title", "year", "duration", "genre"]
+
+
+def detect_format(path):
+    return "jsonl" if path.endswith((".jsonl", ".json", ".ndjson")) else "csv"
+
+
+def read_records(f, fmt):
+    if fmt == "csv":
+        yield from csv.DictReader(f)
+    else:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class GenreResolver:
+    """Название жанра -> id по словарю в памяти; новые жанры добавляются в БД."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.ids = {title: genre_id for genre_id, title in
+                    connection.execute("SELECT id, title FROM genres")}
+        self.created = 0
+
+    def __call__(self, title):
+        title = str(title).strip()
+        genre_id = self.ids.get(title)
+        if genre_id is None:
+            cur = self.connection.execute("INSERT INTO genres (title) VALUES (?)", (title,))
+            genre_id = self.ids[title] = cur.lastrowid
+            self.created += 1
+        return genre_id
+
+
+def report(done, started, out=sys.stderr):
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(f"{done} фильмов за {elapsed:.1f} с ({done / elapsed:.0f} в секунду)", file=out)
+
+
+def import_films(connection, path, fmt=None, batch_size=BATCH_SIZE, progress=report):
+    """Потоково загружает фильмы пачками executemany в одной транзакции. Возвращает число фильмов."""
+    fmt = fmt or detect_format(path)
+    journal = connection.execute("PRAGMA journal_mode").fetchone()[0]
+    synchronous = connection.execute("PRAGMA synchronous").fetchone()[0]
+    # На время загрузки: журнал WAL и без fsync на каждую страницу
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=OFF")
+    started = time.perf_counter()
+    done = 0
+    try:
+        resolve = GenreResolver(connection)
+        with open(path, newline='', encoding='utf-8') as f:
+            records = read_records(f, fmt)
+            while True:
+                batch = [(r["title"], int(r["year"]), int(r["duration"]), resolve(r["genre"]))
+                         for r in islice(records, batch_size)]
+                if not batch:
+                    break
+                connection.executemany(
+                    "INSERT INTO films (title, year, duration, genre) VALUES (?, ?, ?, ?)", batch)
+                done += len(batch)
+                if progress:
+                    progress(done, started)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.execute(f"PRAGMA synchronous={synchronous}")
+        if journal.lower() != "wal":
+            connection.execute(f"PRAGMA journal_mode={journal}")
+    return done
+
+
+def export_films(connection, path, fmt=None, progress=report):
+    """Пишет фильмы построчно прямо из курсора, не держа выборку в памяти."""
+    fmt = fmt or detect_format(path)
+    cursor = connection.execute("""
+        SELECT films.title, films.year, films.duration, genres.title
+        FROM films
+        JOIN genres ON films.genre = genres.id
+        ORDER BY films.id
+    """)
+    started = time.perf_counter()
+    done = 0
+    with open(path, "w", newline='', encoding='utf-8') as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(FIELDS)
+            for row in cursor:
+                writer.writerow(row)
+                done += 1
+        else:
+            for row in cursor:
+                f.write(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + "\n")
+                done += 1
+    if progress:
+        progress(done, started)
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Импорт и экспорт фильмов")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("path", help="файл .csv или .jsonl")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="строк в одном executemany")
+    args = parser.parse_args(argv)
+
+    connection = sqlite3.connect(args.db)
+    try:
+        if args.command == "import":
+            import_films(connection, args.path, batch_size=args.batch)
+        else:
+            export_films(connection, args.path)
+    except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    finally:
+        connection.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
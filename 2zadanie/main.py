@@ -1,11 +1,60 @@
 import sys
 import os
+import re
 import sqlite3
+import threading
+import time
+from urllib.request import pathname2url
 from datetime import datetime
 from PyQt5 import uic
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QTableWidgetItem, QMessageBox,QDialog, QFormLayout, QLineEdit, QSpinBox, QPushButton, QVBoxLayout, QComboBox)
-from PyQt5.QtCore import Qt
+    QApplication, QMainWindow, QMessageBox,QDialog, QFormLayout, QLineEdit, QSpinBox, QPushButton, QVBoxLayout, QComboBox)
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QObject, QThread, pyqtSignal, pyqtSlot
+
+DB_PATH = "films_db.sqlite"
+PAGE_SIZE = 200
+
+
+class GenreCache:
+    """Жанры на весь процесс: читаются один раз и перечитываются, только если таблицу меняли.
+
+    Изменения от других соединений (и других копий программы) видны по
+    PRAGMA data_version, поэтому своё соединение держим открытым.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = None
+        self.version = None
+        self.genres = []
+        self.positions = {}
+
+    def get(self):
+        """[(id, title), ...] по алфавиту."""
+        if self.conn is None:
+            self.conn = connect_db(self.path, readonly=True)
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self.version:
+            self.genres = self.conn.execute("SELECT id, title FROM genres ORDER BY title").fetchall()
+            self.positions = {genre_id: i for i, (genre_id, _) in enumerate(self.genres)}
+            self.version = version
+        return self.genres
+
+    def index_of(self, genre_id):
+        """Позиция жанра в списке get() (и в combo box), None — нет такого."""
+        return self.positions.get(genre_id)
+
+    def invalidate(self):
+        self.version = None
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        self.invalidate()
+
+
+GENRES = GenreCache(DB_PATH)
 
 
 class FilmDialog(QDialog):
@@ -30,12 +79,10 @@ class FilmDialog(QDialog):
             self.title_edit.setText(film_data.get("title", ""))
             self.year_spin.setValue(film_data.get("year", 2000))
             self.duration_spin.setValue(film_data.get("duration", 90))
-            genre_id = film_data.get("genre", 1)
             # Жанр по ID
-            for i in range(self.genre_combo.count()):
-                if int(self.genre_combo.itemData(i)) == genre_id:
-                    self.genre_combo.setCurrentIndex(i)
-                    break
+            pos = GENRES.index_of(film_data.get("genre", 1))
+            if pos is not None:
+                self.genre_combo.setCurrentIndex(pos)
 
         layout = QFormLayout()
         layout.addRow("Название:", self.title_edit)
@@ -56,13 +103,9 @@ class FilmDialog(QDialog):
         self.setLayout(layout)
 
     def load_genres(self):
-        """Загружает список жанров из БД и заполняет combo box"""
+        """Заполняет combo box жанрами из общего кэша"""
         try:
-            conn = sqlite3.connect("films_db.sqlite")
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, title FROM genres ORDER BY title")
-            genres = cursor.fetchall()
-            conn.close()
+            genres = GENRES.get()
 
             self.genre_combo.clear()
             for genre_id, genre_title in genres:
@@ -89,16 +132,450 @@ class FilmDialog(QDialog):
         return True
 
 
+BUSY_TIMEOUT = 5.0
+WRITE_RETRIES = 5
+
+
+def connect_db(path, readonly=False):
+    """Соединение в режиме WAL: читатели не ждут писателя, занятая БД ждёт BUSY_TIMEOUT.
+
+    readonly — отдельное соединение только для чтения (несколько копий
+    программы могут листать каталог, пока одна редактирует).
+    """
+    if readonly:
+        uri = "file:" + pathname2url(os.path.abspath(path)) + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT)
+    else:
+        conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def with_retry(fn, conn):
+    """Выполняет запись fn(conn), при «database is locked» повторяет с растущей паузой."""
+    delay = 0.05
+    for attempt in range(WRITE_RETRIES):
+        try:
+            return fn(conn)
+        except sqlite3.OperationalError as e:
+            busy = "locked" in str(e) or "busy" in str(e)
+            if not busy or attempt == WRITE_RETRIES - 1:
+                raise
+            if conn.in_transaction:
+                conn.rollback()
+            time.sleep(delay)
+            delay *= 2
+
+
+class QueryWorker(QObject):
+    """Живёт в отдельном потоке со своим соединением и по очереди выполняет запросы."""
+
+    done = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.writer = None
+        self.reader = None
+        self.connection = None
+        self.current = None
+        self.cancelled = set()
+        # Запросы идут строго по возрастанию id: всё, что <= started, уже начато
+        self.started = 0
+        # current/connection/cancelled/started меняются в потоке БД, а читаются из GUI-потока в cancel
+        self.lock = threading.Lock()
+
+    @pyqtSlot(int, object, bool)
+    def run(self, request_id, fn, write):
+        with self.lock:
+            self.started = request_id
+            if request_id in self.cancelled:
+                self.cancelled.discard(request_id)
+                return
+        # Писатель открываем первым: он переводит БД в WAL
+        if self.writer is None:
+            self.writer = connect_db(self.path)
+        if not write and self.reader is None:
+            self.reader = connect_db(self.path, readonly=True)
+        connection = self.writer if write else self.reader
+        with self.lock:
+            self.current, self.connection = request_id, connection
+        try:
+            result = with_retry(fn, connection) if write else fn(connection)
+            error = None
+        except Exception as e:
+            result, error = None, str(e)
+        with self.lock:
+            self.current = self.connection = None
+            cancelled = request_id in self.cancelled
+            self.cancelled.discard(request_id)
+        if error is not None and connection.in_transaction:
+            connection.rollback()
+        if cancelled:
+            return
+        if error is None:
+            self.done.emit(request_id, result)
+        else:
+            self.failed.emit(request_id, error)
+
+    def cancel(self, request_id):
+        """Вызывается из GUI-потока: помечает запрос отменённым и прерывает его, если он уже идёт."""
+        with self.lock:
+            if request_id > self.started:
+                self.cancelled.add(request_id)
+            elif request_id == self.current:
+                self.cancelled.add(request_id)
+                self.connection.interrupt()
+            # иначе запрос уже выполнен: его результат отбросит Database.forget
+
+    @pyqtSlot()
+    def close(self):
+        for conn in (self.reader, self.writer):
+            if conn is not None:
+                conn.close()
+        self.reader = self.writer = self.connection = None
+
+
+class Database(QObject):
+    """Очередь запросов к БД в фоновом потоке; результаты приходят в GUI-поток через сигналы.
+
+    submit(fn, on_done, on_error, channel): fn(connection) выполняется в потоке
+    БД, on_done(result) / on_error(message) вызываются в GUI-потоке. Новый
+    запрос в том же channel отменяет предыдущий (если тот ещё выполняется —
+    через connection.interrupt()). Чтение идёт через отдельное соединение
+    только для чтения, запись (write=True) — через писателя с повторами.
+    """
+
+    requested = pyqtSignal(int, object, bool)
+    closing = pyqtSignal()
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.thread = QThread(self)
+        self.worker = QueryWorker(path)
+        self.worker.moveToThread(self.thread)
+        self.requested.connect(self.worker.run)
+        self.closing.connect(self.worker.close)
+        self.worker.done.connect(self.on_done)
+        self.worker.failed.connect(self.on_failed)
+        self.thread.start()
+        self.next_id = 0
+        self.callbacks = {}
+        self.channels = {}
+
+    def submit(self, fn, on_done=None, on_error=None, channel=None, write=False):
+        self.next_id += 1
+        request_id = self.next_id
+        if channel is not None:
+            self.cancel(channel)
+            self.channels[channel] = request_id
+        self.callbacks[request_id] = (on_done, on_error)
+        self.requested.emit(request_id, fn, write)
+        return request_id
+
+    def query(self, sql, params=(), on_done=None, on_error=None, channel=None):
+        """SELECT -> список строк."""
+        return self.submit(lambda conn: conn.execute(sql, params).fetchall(),
+                           on_done, on_error, channel)
+
+    def execute(self, sql, params=(), on_done=None, on_error=None):
+        """Изменение с commit -> lastrowid."""
+        def write(conn):
+            cur = conn.execute(sql, params)
+            conn.commit()
+            return cur.lastrowid
+        return self.submit(write, on_done, on_error, write=True)
+
+    def cancel(self, channel):
+        request_id = self.channels.pop(channel, None)
+        if request_id is None or self.callbacks.pop(request_id, None) is None:
+            return
+        self.worker.cancel(request_id)
+
+    def on_done(self, request_id, result):
+        on_done, _ = self.forget(request_id)
+        if on_done is not None:
+            on_done(result)
+
+    def on_failed(self, request_id, message):
+        _, on_error = self.forget(request_id)
+        if on_error is not None:
+            on_error(message)
+
+    def forget(self, request_id):
+        for channel, rid in list(self.channels.items()):
+            if rid == request_id:
+                del self.channels[channel]
+        return self.callbacks.pop(request_id, (None, None))
+
+    def close(self):
+        self.callbacks.clear()
+        self.closing.emit()
+        self.thread.quit()
+        self.thread.wait()
+
+
+def ensure_search_schema(connection):
+    """Индексы для фильтров/сортировки и FTS5-таблица по названиям, синхронная с films."""
+    cur = connection.cursor()
+    cur.execute("CREATE INDEX IF NOT EXISTS films_genre_idx ON films(genre)")
+    cur.execute("CREATE INDEX IF NOT EXISTS films_year_idx ON films(year)")
+    cur.execute("CREATE INDEX IF NOT EXISTS films_duration_idx ON films(duration)")
+    cur.execute("CREATE INDEX IF NOT EXISTS films_title_idx ON films(title)")
+    cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'films_fts'")
+    if cur.fetchone() is None:
+        cur.executescript("""
+            CREATE VIRTUAL TABLE films_fts USING fts5(title, content='films', content_rowid='id');
+            INSERT INTO films_fts(films_fts) VALUES ('rebuild');
+            CREATE TRIGGER films_fts_ai AFTER INSERT ON films BEGIN
+                INSERT INTO films_fts(rowid, title) VALUES (new.id, new.title);
+            END;
+            CREATE TRIGGER films_fts_ad AFTER DELETE ON films BEGIN
+                INSERT INTO films_fts(films_fts, rowid, title) VALUES ('delete', old.id, old.title);
+            END;
+            CREATE TRIGGER films_fts_au AFTER UPDATE OF title ON films BEGIN
+                INSERT INTO films_fts(films_fts, rowid, title) VALUES ('delete', old.id, old.title);
+                INSERT INTO films_fts(rowid, title) VALUES (new.id, new.title);
+            END;
+        """)
+    connection.commit()
+
+
+WORD_RE = re.compile(r"[^\W_]+")
+
+
+def fts_query(text):
+    """Строка поиска -> запрос FTS5: все слова, каждое как префикс.
+
+    Пунктуацию токенизатор FTS5 всё равно выбрасывает, поэтому берём только
+    буквы и цифры; без слов ("*", "-") — пустая строка, т. е. без фильтра.
+    """
+    words = WORD_RE.findall(text)
+    return " ".join(f'"{w}"*' for w in words)
+
+
+class FilmsModel(QAbstractTableModel):
+    """Фильмы страницами по PAGE_SIZE: следующая страница читается, когда view до неё докрутит.
+
+    Поиск, фильтры и сортировка выполняются в SQLite. Постраничность по
+    ключу (значение колонки сортировки, id) без OFFSET, поэтому каждая
+    страница читается одинаково быстро. Запросы идут через Database в
+    фоновом потоке; ответы на устаревшие запросы (после смены фильтра)
+    отбрасываются по номеру поколения.
+    """
+
+    error = pyqtSignal(str)
+
+    HEADERS = ["id", "title", "year", "duration", "genre"]
+    SORT_COLUMNS = ["films.id", "films.title", "films.year", "films.duration", "genres.title"]
+    SELECT = """
+        SELECT films.id, films.title, films.year, films.duration, genres.title AS genre
+        FROM films
+        JOIN genres ON films.genre = genres.id
+    """
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.generation = 0
+        self.pending = False
+        self.filters = {}
+        self.sort_column = 0
+        self.ascending = True
+        self.rows = []
+        self.keys = {}
+        self.last_key = None
+        self.at_end = False
+
+    def reload(self):
+        self.db.cancel("films-page")
+        self.generation += 1
+        self.pending = False
+        self.beginResetModel()
+        self.rows = []
+        self.keys = {}
+        self.last_key = None
+        self.at_end = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def set_filters(self, search="", genre=None, year=(None, None), duration=(None, None)):
+        self.filters = {"search": search.strip(), "genre": genre, "year": year, "duration": duration}
+        self.reload()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column = max(column, 0)
+        self.ascending = order == Qt.AscendingOrder
+        self.reload()
+
+    def where(self):
+        clauses, params = [], []
+        f = self.filters
+        if f.get("search"):
+            query = fts_query(f["search"])
+            if query:
+                clauses.append("films.id IN (SELECT rowid FROM films_fts WHERE films_fts MATCH ?)")
+                params.append(query)
+        if f.get("genre") is not None:
+            clauses.append("films.genre = ?")
+            params.append(f["genre"])
+        for column in ("year", "duration"):
+            low, high = f.get(column, (None, None))
+            if low is not None:
+                clauses.append(f"films.{column} >= ?")
+                params.append(low)
+            if high is not None:
+                clauses.append(f"films.{column} <= ?")
+                params.append(high)
+        return clauses, params
+
+    def row_key(self, row):
+        return row[self.sort_column], row[0]
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.at_end or self.pending:
+            return
+        clauses, params = self.where()
+        column = self.SORT_COLUMNS[self.sort_column]
+        op, direction = (">", "ASC") if self.ascending else ("<", "DESC")
+        if self.last_key is not None:
+            if self.sort_column == 0:
+                clauses.append(f"films.id {op} ?")
+                params.append(self.last_key[1])
+            else:
+                clauses.append(f"({column}, films.id) {op} (?, ?)")
+                params.extend(self.last_key)
+        query = self.SELECT
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += f" ORDER BY {column} {direction}, films.id {direction} LIMIT ?"
+        self.pending = True
+        generation = self.generation
+        self.db.query(query, params + [PAGE_SIZE],
+                      lambda page: self.add_page(generation, page),
+                      self.page_failed, channel="films-page")
+
+    def page_failed(self, message):
+        self.pending = False
+        self.at_end = True
+        self.error.emit(message)
+
+    def add_page(self, generation, page):
+        if generation != self.generation:
+            return
+        self.pending = False
+        if len(page) < PAGE_SIZE:
+            self.at_end = True
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+            self.rows.extend(page)
+            for row in page:
+                self.keys[row[0]] = self.row_key(row)
+            self.last_key = self.row_key(page[-1])
+            self.endInsertRows()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.at_end and not self.pending
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return str(self.rows[index.row()][index.column()])
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def film_id(self, row):
+        return self.rows[row][0]
+
+    # Точечные правки после добавления/изменения/удаления. Загруженные строки
+    # упорядочены по ключу сортировки, поэтому место фильма ищем бинарным поиском.
+
+    def position(self, key):
+        """Куда встаёт строка с ключом key при текущем порядке."""
+        lo, hi = 0, len(self.rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key = self.row_key(self.rows[mid])
+            if (mid_key < key) if self.ascending else (mid_key > key):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find_row(self, film_id):
+        key = self.keys.get(film_id)
+        if key is None:
+            return None
+        return self.position(key)
+
+    def insert_film(self, film_id):
+        clauses, params = self.where()
+        query = self.SELECT + " WHERE " + " AND ".join(["films.id = ?"] + clauses)
+        generation = self.generation
+        self.db.query(query, [film_id] + params,
+                      lambda rows: self.add_film_row(generation, rows),
+                      self.error.emit)
+
+    def add_film_row(self, generation, rows):
+        if generation != self.generation or not rows:
+            return  # фильтр успел смениться или фильм не подходит под него
+        row = rows[0]
+        film_id = row[0]
+        if film_id in self.keys:
+            return
+        key = self.row_key(row)
+        if not self.at_end and (self.last_key is None or
+                                ((key > self.last_key) if self.ascending else (key < self.last_key))):
+            return  # попадёт в одну из следующих страниц
+        pos = self.position(key)
+        self.beginInsertRows(QModelIndex(), pos, pos)
+        self.rows.insert(pos, row)
+        self.keys[film_id] = key
+        self.endInsertRows()
+
+    def update_film(self, film_id):
+        # Фильм мог поменять место в сортировке или перестать подходить под фильтр
+        self.remove_film(film_id)
+        self.insert_film(film_id)
+
+    def remove_film(self, film_id):
+        pos = self.find_row(film_id)
+        if pos is None:
+            return
+        self.beginRemoveRows(QModelIndex(), pos, pos)
+        del self.rows[pos]
+        del self.keys[film_id]
+        self.endRemoveRows()
+
+
 class DBSample(QMainWindow):
     def __init__(self):
         super().__init__()
         uic.loadUi('main.ui', self)
 
         # БД
-        db_path = "films_db.sqlite"
+        db_path = DB_PATH
         if not os.path.exists(db_path):
             self.create_test_db(db_path)
-        self.connection = sqlite3.connect(db_path)
+        # Все запросы — в фоновом потоке со своим соединением
+        self.db = Database(db_path, self)
+        self.db.submit(ensure_search_schema, write=True, on_error=lambda msg: QMessageBox.warning(
+            self, "Ошибка", f"Не удалось создать индексы для поиска:\n{msg}"))
+        self.model = FilmsModel(self.db, self)
+        self.model.error.connect(
+            lambda msg: QMessageBox.critical(self, "Ошибка", f"Загрузка не удалась:\n{msg}"))
+        self.tableView.setModel(self.model)
 
         # Добавим кнопки программно
         from PyQt5.QtWidgets import QHBoxLayout, QWidget
@@ -124,8 +601,56 @@ class DBSample(QMainWindow):
             self.setCentralWidget(widget)
         main_layout.insertLayout(0, button_layout)
 
+        # Поиск и фильтры — всё считается в SQLite
+        filter_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Поиск по названию")
+        self.genre_filter = QComboBox()
+        self.genre_filter.addItem("Все жанры", None)
+        try:
+            for genre_id, genre_title in GENRES.get():
+                self.genre_filter.addItem(genre_title, genre_id)
+        except sqlite3.Error:
+            pass
+        # Минимальное значение спинбокса означает «без ограничения»
+        self.year_from = self.make_filter_spin(1889, datetime.now().year, "год от")
+        self.year_to = self.make_filter_spin(1889, datetime.now().year, "год до")
+        self.duration_from = self.make_filter_spin(0, 10000, "мин от")
+        self.duration_to = self.make_filter_spin(0, 10000, "мин до")
+
+        filter_layout.addWidget(self.search_edit)
+        filter_layout.addWidget(self.genre_filter)
+        for spin in (self.year_from, self.year_to, self.duration_from, self.duration_to):
+            filter_layout.addWidget(spin)
+            spin.valueChanged.connect(self.apply_filters)
+        self.search_edit.textChanged.connect(self.apply_filters)
+        self.genre_filter.currentIndexChanged.connect(self.apply_filters)
+        main_layout.insertLayout(1, filter_layout)
+
+        # Клик по заголовку сортирует запросом к БД
+        self.tableView.setSortingEnabled(True)
+        self.tableView.sortByColumn(0, Qt.AscendingOrder)
+
         self.load_films()
 
+    def make_filter_spin(self, low, high, placeholder):
+        spin = QSpinBox()
+        spin.setRange(low, high)
+        spin.setSpecialValueText(placeholder)
+        spin.setValue(low)
+        return spin
+
+    def apply_filters(self):
+        def bound(spin):
+            return None if spin.value() == spin.minimum() else spin.value()
+
+        self.model.set_filters(
+            search=self.search_edit.text(),
+            genre=self.genre_filter.currentData(),
+            year=(bound(self.year_from), bound(self.year_to)),
+            duration=(bound(self.duration_from), bound(self.duration_to)),
+        )
+
     def create_test_db(self, path):
         con = sqlite3.connect(path)
         cur = con.cursor()
@@ -146,39 +671,14 @@ class DBSample(QMainWindow):
         con.close()
 
     def load_films(self):
-        try:
-            cursor = self.connection.cursor()
-            # JOIN для получения названия жанра
-            query = """
-                SELECT films.id, films.title, films.year, films.duration, genres.title AS genre
-                FROM films
-                JOIN genres ON films.genre = genres.id
-                ORDER BY films.id
-            """
-            cursor.execute(query)
-            rows = cursor.fetchall()
-
-            headers = [desc[0] for desc in cursor.description]
-            self.tableWidget.setColumnCount(len(headers))
-            self.tableWidget.setHorizontalHeaderLabels(headers)
-            self.tableWidget.setRowCount(len(rows))
-
-            for i, row in enumerate(rows):
-                for j, val in enumerate(row):
-                    item = QTableWidgetItem(str(val))
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                    self.tableWidget.setItem(i, j, item)
-
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Загрузка не удалась:\n{e}")
+        # Первая страница запрашивается сразу, остальные — когда view до них докрутит
+        self.model.reload()
 
     def get_selected_film_id(self):
-        selected = self.tableWidget.selectedItems()
+        selected = self.tableView.selectionModel().selectedRows()
         if not selected:
             return None
-        row = selected[0].row()
-        id_item = self.tableWidget.item(row, 0)
-        return int(id_item.text()) if id_item else None
+        return self.model.film_id(selected[0].row())
 
     def add_film(self):
         dialog = FilmDialog(self)
@@ -186,17 +686,15 @@ class DBSample(QMainWindow):
             if not dialog.validate():
                 return
             data = dialog.get_data()
-            try:
-                cur = self.connection.cursor()
-                cur.execute(
-                    "INSERT INTO films (title, year, duration, genre) VALUES (?, ?, ?, ?)",
-                    (data["title"], data["year"], data["duration"], data["genre"])
-                )
-                self.connection.commit()
-                self.load_films()
-                QMessageBox.information(self, "Успех", "Фильм добавлен.")
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось добавить:\n{e}")
+            self.db.execute(
+                "INSERT INTO films (title, year, duration, genre) VALUES (?, ?, ?, ?)",
+                (data["title"], data["year"], data["duration"], data["genre"]),
+                on_done=self.film_added,
+                on_error=lambda msg: QMessageBox.critical(self, "Ошибка", f"Не удалось добавить:\n{msg}"))
+
+    def film_added(self, film_id):
+        self.model.insert_film(film_id)
+        QMessageBox.information(self, "Успех", "Фильм добавлен.")
 
     def edit_film(self):
         film_id = self.get_selected_film_id()
@@ -204,32 +702,31 @@ class DBSample(QMainWindow):
             QMessageBox.warning(self, "Ошибка", "Выберите фильм для редактирования.")
             return
 
-        try:
-            cur = self.connection.cursor()
-            cur.execute("SELECT title, year, duration, genre FROM films WHERE id = ?", (film_id,))
-            row = cur.fetchone()
-            if not row:
-                raise Exception("Фильм не найден")
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить фильм:\n{e}")
-            return
+        self.db.query(
+            "SELECT title, year, duration, genre FROM films WHERE id = ?", (film_id,),
+            on_done=lambda rows: self.film_loaded(film_id, rows),
+            on_error=lambda msg: QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить фильм:\n{msg}"))
 
+    def film_loaded(self, film_id, rows):
+        if not rows:
+            QMessageBox.critical(self, "Ошибка", "Не удалось загрузить фильм:\nФильм не найден")
+            return
+        row = rows[0]
         film_data = {"title": row[0], "year": row[1], "duration": row[2], "genre": row[3]}
         dialog = FilmDialog(self, film_data=film_data)
         if dialog.exec_() == QDialog.Accepted:
             if not dialog.validate():
                 return
             data = dialog.get_data()
-            try:
-                cur.execute(
-                    "UPDATE films SET title = ?, year = ?, duration = ?, genre = ? WHERE id = ?",
-                    (data["title"], data["year"], data["duration"], data["genre"], film_id)
-                )
-                self.connection.commit()
-                self.load_films()
-                QMessageBox.information(self, "Успех", "Фильм обновлён.")
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось обновить:\n{e}")
+            self.db.execute(
+                "UPDATE films SET title = ?, year = ?, duration = ?, genre = ? WHERE id = ?",
+                (data["title"], data["year"], data["duration"], data["genre"], film_id),
+                on_done=lambda _: self.film_updated(film_id),
+                on_error=lambda msg: QMessageBox.critical(self, "Ошибка", f"Не удалось обновить:\n{msg}"))
+
+    def film_updated(self, film_id):
+        self.model.update_film(film_id)
+        QMessageBox.information(self, "Успех", "Фильм обновлён.")
 
     def delete_film(self):
         film_id = self.get_selected_film_id()
@@ -245,17 +742,18 @@ class DBSample(QMainWindow):
         if reply == QMessageBox.No:
             return
 
-        try:
-            cur = self.connection.cursor()
-            cur.execute("DELETE FROM films WHERE id = ?", (film_id,))
-            self.connection.commit()
-            self.load_films()
-            QMessageBox.information(self, "Успех", "Фильм удалён.")
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось удалить:\n{e}")
+        self.db.execute(
+            "DELETE FROM films WHERE id = ?", (film_id,),
+            on_done=lambda _: self.film_deleted(film_id),
+            on_error=lambda msg: QMessageBox.critical(self, "Ошибка", f"Не удалось удалить:\n{msg}"))
+
+    def film_deleted(self, film_id):
+        self.model.remove_film(film_id)
+        QMessageBox.information(self, "Успех", "Фильм удалён.")
 
     def closeEvent(self, event):
-        self.connection.close()
+        self.db.close()
+        GENRES.close()
         event.accept()
 
 
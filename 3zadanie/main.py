@@ -1,15 +1,76 @@
 # drawing_app.py
 import sys
 import random
+from array import array
+
 from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout
-from PyQt5.QtGui import QPainter, QBrush, QColor, QPolygon
-from PyQt5.QtCore import Qt, QPoint
+from PyQt5.QtGui import QPainter, QColor, QPixmap
+from PyQt5.QtCore import Qt, QPoint, QRect, QRectF
 from PyQt5 import uic
 
+class ShapeStore:
+    """Фигуры в колонках array: код типа, x, y, размер и цвет 0xRRGGBB — 15 байт на фигуру."""
+
+    TYPES = ('circle', 'square', 'triangle')
+
+    def __init__(self):
+        self.type = array('B')
+        self.x = array('i')
+        self.y = array('i')
+        self.size = array('H')
+        self.rgb = array('I')
+
+    def __len__(self):
+        return len(self.type)
+
+    def append(self, shape_type, x, y, size, color):
+        r, g, b = color
+        self.type.append(self.TYPES.index(shape_type))
+        self.x.append(x)
+        self.y.append(y)
+        self.size.append(size)
+        self.rgb.append((r << 16) | (g << 8) | b)
+
+    def __getitem__(self, i):
+        rgb = self.rgb[i]
+        return (self.TYPES[self.type[i]], self.x[i], self.y[i], self.size[i],
+                (rgb >> 16, (rgb >> 8) & 0xFF, rgb & 0xFF))
+
+    def draw(self, painter, start=0):
+        """Рисует фигуры начиная с start прямо из колонок, по порядку добавления.
+
+        Кисть меняется только при смене цвета; промежуточных списков и
+        кортежей на фигуру не создаётся.
+        """
+        circle, square = self.TYPES.index('circle'), self.TYPES.index('square')
+        ellipse, rect, polygon = painter.drawEllipse, painter.drawRect, painter.drawPolygon
+        columns = (self.type, self.x, self.y, self.size, self.rgb)
+        if start:
+            # Срез копирует только хвост, а не проходит по всем ранним фигурам
+            columns = [column[start:] for column in columns]
+        brush = None
+        for kind, x, y, size, rgb in zip(*columns):
+            if rgb != brush:
+                painter.setBrush(QColor(rgb))
+                brush = rgb
+            if kind == circle:
+                ellipse(x - size, y - size, size * 2, size * 2)
+            elif kind == square:
+                rect(x - size, y - size, size * 2, size * 2)
+            else:
+                polygon(QPoint(x, y - size), QPoint(x - size, y + size), QPoint(x + size, y + size))
+
+
 class DrawingWidget(QWidget):
+    # Холст растёт кусками, чтобы при растягивании окна не перерисовывать всё на каждом шаге
+    CANVAS_STEP = 512
+
     def __init__(self):
         super().__init__()
-        self.shapes = []
+        self.shapes = ShapeStore()
+        # Готовая картинка всех фигур: новая фигура дорисовывается на неё один раз,
+        # а paintEvent только копирует изменившийся прямоугольник
+        self.canvas = QPixmap()
 
     def mousePressEvent(self, event):
         x, y = event.x(), event.y()
@@ -26,28 +87,48 @@ class DrawingWidget(QWidget):
     def add_shape(self, shape_type, x, y):
         color = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
         size = random.randint(10, 50)
-        self.shapes.append((shape_type, x, y, size, color))
-        self.update()
+        self.shapes.append(shape_type, x, y, size, color)
+        if not self.canvas.isNull():
+            painter = self.canvas_painter()
+            self.shapes.draw(painter, len(self.shapes) - 1)
+            painter.end()
+        # +1 пиксель на сглаживание краёв
+        self.update(QRect(x - size - 1, y - size - 1, size * 2 + 2, size * 2 + 2))
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
+    def canvas_painter(self):
+        painter = QPainter(self.canvas)
         painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        return painter
 
-        for shape_type, x, y, size, (r, g, b) in self.shapes:
-            painter.setBrush(QBrush(QColor(r, g, b)))
-            painter.setPen(Qt.NoPen)
-
-            if shape_type == 'circle':
-                painter.drawEllipse(x - size, y - size, size * 2, size * 2)
-            elif shape_type == 'square':
-                painter.drawRect(x - size, y - size, size * 2, size * 2)
-            elif shape_type == 'triangle':
-                points = [
-                    QPoint(x, y - size),
-                    QPoint(x - size, y + size),
-                    QPoint(x + size, y + size)
-                ]
-                painter.drawPolygon(QPolygon(points))
+    def ensure_canvas(self):
+        """Пересоздаёт холст, если окно стало больше него, и заново рисует на нём все фигуры."""
+        ratio = self.devicePixelRatioF()
+        width, height = self.width(), self.height()
+        if (not self.canvas.isNull() and self.canvas.devicePixelRatioF() == ratio
+                and self.canvas.width() >= width * ratio and self.canvas.height() >= height * ratio):
+            return
+        step = self.CANVAS_STEP
+        width = -(-width // step) * step
+        height = -(-height // step) * step
+        self.canvas = QPixmap(int(width * ratio), int(height * ratio))
+        self.canvas.setDevicePixelRatio(ratio)
+        self.canvas.fill(Qt.transparent)
+        painter = self.canvas_painter()
+        self.shapes.draw(painter)
+        painter.end()
+
+    def resizeEvent(self, event):
+        self.ensure_canvas()
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        self.ensure_canvas()
+        painter = QPainter(self)
+        rect = event.rect()
+        ratio = self.canvas.devicePixelRatioF()
+        source = QRectF(rect.x() * ratio, rect.y() * ratio, rect.width() * ratio, rect.height() * ratio)
+        painter.drawPixmap(QRectF(rect), self.canvas, source)
 
 
 class MainWindow(QMainWindow):
@@ -34,6 +34,12 @@ class Ui_AuthDialog(object):
         self.pwd_edit.setObjectName("pwd_edit")
         self.hLayoutPwd.addWidget(self.pwd_edit)
         self.verticalLayout.addLayout(self.hLayoutPwd)
+        self.remember_check = QtWidgets.QCheckBox(parent=AuthDialog)
+        self.remember_check.setObjectName("remember_check")
+        self.verticalLayout.addWidget(self.remember_check)
+        self.status_label = QtWidgets.QLabel(parent=AuthDialog)
+        self.status_label.setObjectName("status_label")
+        self.verticalLayout.addWidget(self.status_label)
         self.hLayoutButtons = QtWidgets.QHBoxLayout()
         self.hLayoutButtons.setObjectName("hLayoutButtons")
         spacerItem = QtWidgets.QSpacerItem(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
@@ -54,5 +60,6 @@ class Ui_AuthDialog(object):
         AuthDialog.setWindowTitle(_translate("AuthDialog", "Вход / Регистрация"))
         self.label_login.setText(_translate("AuthDialog", "Логин:"))
         self.label_pwd.setText(_translate("AuthDialog", "Пароль:"))
+        self.remember_check.setText(_translate("AuthDialog", "Запомнить меня на этом компьютере"))
         self.login_btn.setText(_translate("AuthDialog", "Войти"))
         self.register_btn.setText(_translate("AuthDialog", "Зарегистрироваться"))
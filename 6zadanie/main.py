@@ -1,27 +1,51 @@
 # main.py
 import sys
 import os
+import re
 import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from urllib.request import pathname2url
 import hashlib
+import hmac
 import secrets
 import binascii
+import json
 import shutil
-import uuid
+import tempfile
+from bisect import bisect_left
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 from PyQt5 import uic
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QTableWidgetItem, QMessageBox, QPushButton,
-    QDialog, QFileDialog, QWidget, QHBoxLayout
+    QApplication, QMainWindow, QMessageBox, QPushButton,
+    QDialog, QFileDialog, QWidget, QHBoxLayout, QLineEdit
 )
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap
-from PIL import Image, ImageDraw, ImageFont
+from PyQt5.QtCore import (
+    Qt, QObject, QThread, QTimer, QAbstractTableModel, QModelIndex, QSize, pyqtSignal, pyqtSlot
+)
+from PyQt5.QtGui import QImage, QPixmap, QPixmapCache
+from PIL import Image, ImageDraw, ImageFont, ImageOps, UnidentifiedImageError
 
 # Config 
 DB_FILE = "library.db"
 IMAGES_DIR = "images"
 PLACEHOLDER = "placeholder.png"
+THUMBS_DIR = os.path.join(IMAGES_DIR, "thumbs")
+THUMB_SIZE = (240, 320)
+THUMB_WORKERS = 2
+ICON_SIZE = (24, 32)   # обложка в колонке таблицы
+SHOW_COVERS = True
+PAGE_SIZE = 200
+SEARCH_LIMIT = 100    # лучших совпадений в подсказке поиска
+SEARCH_DELAY = 150    # мс тишины после ввода перед запросом
+GC_GRACE = 3600  # свежие файлы сборщик не трогает: книгу с ними могут ещё сохранять
+SESSION_FILE = "sessions.json"
+SESSION_KEY_FILE = "session.key"
+SESSION_TTL = 7 * 24 * 3600
 
 def resource_path(rel):
     """Support PyInstaller _MEIPASS and normal mode."""
@@ -31,19 +55,321 @@ def resource_path(rel):
         base = os.path.abspath('.')
     return os.path.join(base, rel)
 
-def get_conn():
-    return sqlite3.connect(resource_path(DB_FILE))
+BUSY_TIMEOUT = 5.0
+WRITE_RETRIES = 5
+STATEMENT_CACHE = 256
+
+def connect_db(path, readonly=False):
+    """Соединение в режиме WAL: читатели не ждут писателя, занятая БД ждёт BUSY_TIMEOUT.
+
+    readonly — отдельное соединение только для чтения (несколько копий
+    программы могут листать каталог, пока одна редактирует).
+    """
+    if readonly:
+        uri = "file:" + pathname2url(os.path.abspath(path)) + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT,
+                               cached_statements=STATEMENT_CACHE)
+    else:
+        conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, cached_statements=STATEMENT_CACHE)
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def with_retry(fn, conn):
+    """Выполняет запись fn(conn), при «database is locked» повторяет с растущей паузой."""
+    delay = 0.05
+    for attempt in range(WRITE_RETRIES):
+        try:
+            return fn(conn)
+        except sqlite3.OperationalError as e:
+            busy = "locked" in str(e) or "busy" in str(e)
+            if not busy or attempt == WRITE_RETRIES - 1:
+                raise
+            if conn.in_transaction:
+                conn.rollback()
+            time.sleep(delay)
+            delay *= 2
+
+# Типизированные строки таблиц
+User = namedtuple("User", "id username pwd_hash salt algo iterations")
+Genre = namedtuple("Genre", "id title")
+Book = namedtuple("Book", "id title author year genre image_path")
+
+class ConnectionPool:
+    """Долгоживущие соединения: по писателю и читателю на поток, с кэшем подготовленных запросов.
+
+    Путь к БД вычисляется один раз; sqlite3 кэширует разобранные запросы
+    (cached_statements), поэтому повторные запросы не парсятся заново.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    def connection(self, readonly=False):
+        name = "reader" if readonly else "writer"
+        conn = getattr(self.local, name, None)
+        if conn is None:
+            # Писатель открываем первым: он переводит БД в WAL
+            if readonly:
+                self.connection()
+            conn = connect_db(self.path, readonly)
+            setattr(self.local, name, conn)
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """with POOL.transaction() as conn: ... — commit при выходе, rollback при ошибке."""
+        conn = self.connection()
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+
+    def query(self, sql, params=(), row=None, readonly=True):
+        """Список строк; row — namedtuple-класс для строк результата."""
+        cur = self.connection(readonly).cursor()
+        if row is not None:
+            cur.row_factory = lambda _, values: row(*values)
+        return cur.execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=(), row=None, readonly=True):
+        rows = self.query(sql, params, row, readonly)
+        return rows[0] if rows else None
+
+    def close(self):
+        """Закрывает соединения текущего потока."""
+        for name in ("reader", "writer"):
+            conn = getattr(self.local, name, None)
+            if conn is not None:
+                conn.close()
+                setattr(self.local, name, None)
+
+POOL = ConnectionPool(resource_path(DB_FILE))
+
+
+class GenreCache:
+    """Жанры на весь процесс: читаются один раз и перечитываются, только если таблицу меняли.
+
+    Изменения от других соединений видны по PRAGMA data_version, поэтому
+    своё соединение держим открытым.
+    """
+
+    def __init__(self):
+        self.conn = None
+        self.version = None
+        self.genres = []
+        self.positions = {}
+
+    def get(self):
+        """[Genre(id, title), ...] по алфавиту."""
+        if self.conn is None:
+            self.conn = POOL.connection(readonly=True)
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self.version:
+            self.genres = POOL.query("SELECT id, title FROM genres ORDER BY title", row=Genre)
+            self.positions = {int(gid): i for i, (gid, _) in enumerate(self.genres)}
+            self.version = version
+        return self.genres
+
+    def index_of(self, genre_id):
+        """Позиция жанра в списке get() (и в combo box), None — нет такого."""
+        return self.positions.get(int(genre_id))
+
+    def invalidate(self):
+        self.version = None
+
+    def close(self):
+        # Соединение принадлежит пулу, здесь только забываем его
+        self.conn = None
+        self.invalidate()
+
+GENRES = GenreCache()
 
-def hash_password(password, salt_hex=None, iterations=100_000):
+# Алгоритм и стоимость хеша для новых паролей; старые пересчитываются при входе.
+# Для pbkdf2 стоимость — число итераций, для scrypt — параметр N.
+HASH_COST = {"pbkdf2_sha256": 100_000, "scrypt": 2 ** 14}
+HASH_ALGO = "scrypt" if hasattr(hashlib, "scrypt") else "pbkdf2_sha256"
+
+def hash_password(password, salt_hex=None, algo=HASH_ALGO, iterations=None):
     if salt_hex is None:
         salt = secrets.token_bytes(16)
     else:
         salt = binascii.unhexlify(salt_hex)
-    dk = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    if iterations is None:
+        iterations = HASH_COST[algo]
+    if algo == "scrypt":
+        dk = hashlib.scrypt(password.encode('utf-8'), salt=salt, n=iterations, r=8, p=1, dklen=32)
+    else:
+        dk = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
     return binascii.hexlify(dk).decode('ascii'), binascii.hexlify(salt).decode('ascii')
 
+def verify_password(password, user):
+    """Сравнение за постоянное время, с алгоритмом и стоимостью, сохранёнными у пользователя."""
+    calc, _ = hash_password(password, user.salt, user.algo, user.iterations)
+    return hmac.compare_digest(calc, user.pwd_hash)
+
+def needs_rehash(user):
+    return user.algo != HASH_ALGO or user.iterations != HASH_COST[HASH_ALGO]
+
+def check_login(password, user):
+    """Выполняется в пуле: (пароль верен, новый (хеш, соль) или None)."""
+    if not verify_password(password, user):
+        return False, None
+    return True, (hash_password(password) if needs_rehash(user) else None)
+
+class SessionStore:
+    """Подписанные сессии «запомнить меня» на этом компьютере.
+
+    Токен user_id.expires.nonce.подпись (HMAC-SHA256 на локальном ключе)
+    лежит в sessions.json по логину, nonce — в таблице sessions, чтобы
+    сессию можно было отозвать. Вход по токену не считает хеш пароля.
+    """
+
+    def __init__(self, path, key_path):
+        self.path = path
+        self.key_path = key_path
+        self.secret = None
+
+    def key(self):
+        if self.secret is None:
+            try:
+                with open(self.key_path, 'rb') as f:
+                    self.secret = f.read()
+            except FileNotFoundError:
+                self.secret = secrets.token_bytes(32)
+                fd = os.open(self.key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(self.secret)
+        return self.secret
+
+    def sign(self, payload):
+        return hmac.new(self.key(), payload.encode('ascii'), 'sha256').hexdigest()
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"last": None, "tokens": {}}
+
+    def save(self, data):
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def last_user(self):
+        """Логин последнего входа с сохранённой сессией."""
+        data = self.load()
+        return data["last"] if data["last"] in data["tokens"] else None
+
+    def issue(self, user_id, username):
+        nonce = secrets.token_hex(16)
+        expires = int(time.time()) + SESSION_TTL
+        payload = f"{user_id}.{expires}.{nonce}"
+        data = self.load()
+        old = data["tokens"].get(username, "").split(".")
+        with POOL.transaction() as conn:
+            # Прежний токен этого логина больше не нужен
+            if len(old) == 4:
+                conn.execute("DELETE FROM sessions WHERE nonce = ?", (old[2],))
+            conn.execute("DELETE FROM sessions WHERE expires < ?", (time.time(),))
+            conn.execute("INSERT INTO sessions (nonce, user_id, expires) VALUES (?, ?, ?)",
+                         (nonce, user_id, expires))
+        data["tokens"][username] = payload + "." + self.sign(payload)
+        data["last"] = username
+        self.save(data)
+
+    def resume(self, username):
+        """id пользователя по действующему токену, иначе None (негодный токен удаляется)."""
+        token = self.load()["tokens"].get(username)
+        if token is None:
+            return None
+        try:
+            user_id, expires, nonce, signature = token.split(".")
+            user_id, expires = int(user_id), int(expires)
+        except ValueError:
+            user_id = None
+        if (user_id is None or expires < time.time()
+                or not hmac.compare_digest(signature, self.sign(f"{user_id}.{expires}.{nonce}"))
+                or not POOL.query_one("SELECT 1 FROM sessions WHERE nonce = ? AND user_id = ?",
+                                      (nonce, user_id))):
+            self.forget(username)
+            return None
+        return user_id
+
+    def forget(self, username):
+        data = self.load()
+        token = data["tokens"].pop(username, None)
+        if token is None:
+            return
+        parts = token.split(".")
+        if len(parts) == 4:
+            with POOL.transaction() as conn:
+                conn.execute("DELETE FROM sessions WHERE nonce = ?", (parts[2],))
+        self.save(data)
+
+SESSIONS = SessionStore(resource_path(SESSION_FILE), resource_path(SESSION_KEY_FILE))
+
+class WorkerPool(QObject):
+    """Пул потоков для медленных задач: хеши паролей, миниатюры обложек.
+
+    hashlib и Pillow отпускают GIL, поэтому задачи идут параллельно.
+    Результаты возвращаются в поток GUI сигналом; progress — число
+    выполняемых задач, чтобы окно могло показать состояние.
+    """
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+    progress = pyqtSignal(int)
+
+    def __init__(self, parent=None, workers=None):
+        super().__init__(parent)
+        self.pool = ThreadPoolExecutor(workers or os.cpu_count(), thread_name_prefix="hash")
+        self.next_id = 0
+        self.pending = {}
+        self.finished.connect(self.on_finished)
+        self.failed.connect(self.on_failed)
+
+    def submit(self, fn, *args, on_done=None, on_error=None):
+        self.next_id += 1
+        job_id = self.next_id
+        self.pending[job_id] = (on_done, on_error)
+        self.pool.submit(fn, *args).add_done_callback(lambda f: self.emit_result(job_id, f))
+        self.progress.emit(len(self.pending))
+        return job_id
+
+    def emit_result(self, job_id, future):
+        # Вызывается в потоке пула, сигнал доставляется в поток GUI через очередь
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            self.finished.emit(job_id, future.result())
+        else:
+            self.failed.emit(job_id, str(error))
+
+    def on_finished(self, job_id, result):
+        on_done, _ = self.pending.pop(job_id, (None, None))
+        self.progress.emit(len(self.pending))
+        if on_done is not None:
+            on_done(result)
+
+    def on_failed(self, job_id, message):
+        _, on_error = self.pending.pop(job_id, (None, None))
+        self.progress.emit(len(self.pending))
+        if on_error is not None:
+            on_error(message)
+
+    def close(self):
+        self.pending.clear()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
 def ensure_storage():
-    Path(resource_path(IMAGES_DIR)).mkdir(parents=True, exist_ok=True)
+    Path(resource_path(THUMBS_DIR)).mkdir(parents=True, exist_ok=True)
     ph = resource_path(os.path.join(IMAGES_DIR, PLACEHOLDER))
     if not os.path.exists(ph):
         try:
@@ -67,8 +393,172 @@ def ensure_storage():
         except Exception as e:
             print("Placeholder create error:", e)
 
-def init_db():
-    conn = get_conn(); cur = conn.cursor()
+def store_image(src):
+    """Выполняется в пуле: кладёт файл в images/ под именем sha256 содержимого.
+
+    Возвращает относительный путь. Если такая обложка уже есть, копия не
+    создаётся — файл только «освежается», чтобы его не удалил сборщик.
+    """
+    h = hashlib.sha256()
+    with open(src, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    rel = f"{IMAGES_DIR}/{h.hexdigest()}{os.path.splitext(src)[1].lower()}"
+    dst = resource_path(rel)
+    if os.path.exists(dst):
+        os.utime(dst)
+    else:
+        tmp = dst + ".tmp"
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    return rel
+
+def image_file(rel):
+    # В старых записях встречаются пути с обратной косой чертой
+    return os.path.normcase(resource_path(os.path.normpath(rel.replace("\\", "/"))))
+
+def collect_garbage(grace=GC_GRACE):
+    """Удаляет обложки без ссылок из books и их миниатюры. Возвращает (файлов, байт)."""
+    with POOL.transaction() as conn:
+        conn.execute("DELETE FROM images WHERE refs <= 0")
+    referenced = {image_file(path) for (path,) in POOL.query("SELECT path FROM images")}
+    referenced.add(image_file(os.path.join(IMAGES_DIR, PLACEHOLDER)))
+    thumbs = set()
+    for path in referenced:
+        try:
+            thumbs.add(os.path.normcase(thumb_path(thumb_key(path))))
+        except OSError:
+            pass
+
+    removed = freed = 0
+    deadline = time.time() - grace
+    for folder, keep in ((IMAGES_DIR, referenced), (THUMBS_DIR, thumbs)):
+        for entry in os.scandir(resource_path(folder)):
+            if not entry.is_file() or os.path.normcase(entry.path) in keep:
+                continue
+            st = entry.stat()
+            if st.st_mtime > deadline:
+                continue
+            os.remove(entry.path)
+            removed += 1
+            freed += st.st_size
+    return removed, freed
+
+def thumb_key(src):
+    """Ключ миниатюры: путь и mtime оригинала, заменённый файл получит новую."""
+    return f"{os.path.abspath(src)}:{os.stat(src).st_mtime_ns}"
+
+def thumb_path(key):
+    name = hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+    return resource_path(os.path.join(THUMBS_DIR, name + ".png"))
+
+def make_thumbnail(src, dst):
+    """Выполняется в пуле: уменьшает оригинал до THUMB_SIZE и сохраняет PNG."""
+    if os.path.exists(dst):
+        return dst
+    with Image.open(src) as img:
+        # JPEG сразу декодируется в уменьшенном масштабе
+        img.draft("RGB", THUMB_SIZE)
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail(THUMB_SIZE, Image.LANCZOS)
+        # Свой временный файл на задачу: миниатюру и иконку одной обложки могут готовить одновременно
+        fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(dst))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                img.save(f, "PNG")
+            os.replace(tmp, dst)
+        except BaseException:
+            os.remove(tmp)
+            raise
+    return dst
+
+def make_icon(src):
+    """Выполняется в пуле: QImage для колонки обложек (QPixmap в потоке пула создавать нельзя).
+
+    None — файла нет или он не картинка; прочие ошибки (временные) пробрасываются.
+    """
+    try:
+        thumb = make_thumbnail(src, thumb_path(thumb_key(src)))
+    except (FileNotFoundError, UnidentifiedImageError):
+        return None
+    return QImage(thumb).scaled(*ICON_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+class ThumbnailCache:
+    """Миниатюры обложек: на диске в images/thumbs и декодированные в QPixmapCache.
+
+    Оригиналы читает только пул; в потоке GUI загружаются лишь готовые
+    миниатюры, уже уменьшенные до THUMB_SIZE.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.waiting = {}  # ключ -> [callback, ...]
+        self.icons_waiting = set()
+        self.missing = set()
+
+    def get(self, src):
+        """QPixmap миниатюры или None, если её ещё нет."""
+        key = thumb_key(src)
+        pix = QPixmapCache.find(key)
+        if pix is None:
+            path = thumb_path(key)
+            if not os.path.exists(path):
+                return None
+            pix = QPixmap(path)
+            QPixmapCache.insert(key, pix)
+        return pix
+
+    def request(self, src, on_done=None):
+        """Готовит миниатюру в фоне; on_done(QPixmap или None) вызывается в потоке GUI."""
+        try:
+            pix = self.get(src)
+            key = thumb_key(src)
+        except OSError:
+            if on_done is not None:
+                on_done(None)
+            return
+        if pix is not None:
+            if on_done is not None:
+                on_done(pix)
+            return
+        running = key in self.waiting
+        callbacks = self.waiting.setdefault(key, [])
+        if on_done is not None:
+            callbacks.append(on_done)
+        if running:
+            return
+        self.pool.submit(make_thumbnail, src, thumb_path(key),
+                         on_done=lambda path: self.ready(key, QPixmap(path)),
+                         on_error=lambda msg: self.ready(key, None))
+
+    def ready(self, key, pix):
+        if pix is not None:
+            QPixmapCache.insert(key, pix)
+        for callback in self.waiting.pop(key, []):
+            callback(pix)
+
+    def icon(self, src, on_ready):
+        """Иконка обложки для таблицы или None; тогда она готовится в фоне и вызывается on_ready(src)."""
+        pix = QPixmapCache.find("icon:" + src)
+        if pix is not None or src in self.icons_waiting or src in self.missing:
+            return pix
+        self.icons_waiting.add(src)
+        self.pool.submit(make_icon, src,
+                         on_done=lambda image: self.icon_ready(src, image, on_ready),
+                         on_error=lambda msg: self.icons_waiting.discard(src))
+        return None
+
+    def icon_ready(self, src, image, on_ready):
+        self.icons_waiting.discard(src)
+        if image is None:
+            self.missing.add(src)  # файла нет или он не картинка — не пытаемся снова
+            return
+        if image.isNull():
+            return  # миниатюра не прочиталась — попробуем при следующей перерисовке
+        QPixmapCache.insert("icon:" + src, QPixmap.fromImage(image))
+        on_ready(src)
+
+def migrate_base(cur):
     cur.execute("""
     CREATE TABLE IF NOT EXISTS users (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -98,7 +588,257 @@ def init_db():
     if bcnt == 0:
         cur.execute("INSERT INTO books (title, author, year, genre, image_path) VALUES (?, ?, ?, ?, ?)",
                     ("Пример книги", "Автор Примеров", 2020, 1, None))
-    conn.commit(); conn.close()
+
+def migrate_password_params(cur):
+    # До этих колонок все пароли были PBKDF2 со 100 000 итераций
+    columns = {row[1] for row in cur.execute("PRAGMA table_info(users)")}
+    if "algo" not in columns:
+        cur.execute("ALTER TABLE users ADD COLUMN algo TEXT NOT NULL DEFAULT 'pbkdf2_sha256'")
+        cur.execute("ALTER TABLE users ADD COLUMN iterations INTEGER NOT NULL DEFAULT 100000")
+
+def migrate_image_refs(cur):
+    # Счётчик ссылок на файл обложки, поддерживается триггерами на books
+    new_images = not cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'images'").fetchone()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS images (
+        path TEXT PRIMARY KEY,
+        refs INTEGER NOT NULL DEFAULT 0
+    )""")
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS books_image_ai AFTER INSERT ON books
+    WHEN new.image_path IS NOT NULL BEGIN
+        INSERT INTO images (path, refs) VALUES (new.image_path, 1)
+        ON CONFLICT(path) DO UPDATE SET refs = refs + 1;
+    END""")
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS books_image_ad AFTER DELETE ON books
+    WHEN old.image_path IS NOT NULL BEGIN
+        UPDATE images SET refs = refs - 1 WHERE path = old.image_path;
+    END""")
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS books_image_au AFTER UPDATE OF image_path ON books
+    WHEN old.image_path IS NOT new.image_path BEGIN
+        UPDATE images SET refs = refs - 1 WHERE path = old.image_path;
+        INSERT INTO images (path, refs) SELECT new.image_path, 1 WHERE new.image_path IS NOT NULL
+        ON CONFLICT(path) DO UPDATE SET refs = refs + 1;
+    END""")
+    if new_images:
+        cur.execute("""
+        INSERT INTO images (path, refs)
+        SELECT image_path, COUNT(*) FROM books WHERE image_path IS NOT NULL GROUP BY image_path""")
+
+def migrate_books_fts(cur):
+    # Полнотекстовый поиск по названию и автору, синхронный с books
+    if cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'books_fts'").fetchone():
+        return
+    cur.execute("""
+    CREATE VIRTUAL TABLE books_fts USING fts5(
+        title, author, content='books', content_rowid='id', prefix='1 2 3'
+    )""")
+    cur.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+    cur.execute("""
+    CREATE TRIGGER books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END""")
+    cur.execute("""
+    CREATE TRIGGER books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+    END""")
+    cur.execute("""
+    CREATE TRIGGER books_fts_au AFTER UPDATE OF title, author ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+        INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END""")
+
+def migrate_sessions(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS sessions (
+        nonce TEXT PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        expires INTEGER NOT NULL,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )""")
+
+def migrate_book_indexes(cur):
+    cur.execute("CREATE INDEX IF NOT EXISTS books_genre_idx ON books(genre)")
+    cur.execute("CREATE INDEX IF NOT EXISTS books_author_idx ON books(author)")
+    cur.execute("CREATE INDEX IF NOT EXISTS books_title_idx ON books(title)")
+
+# Миграция N переводит БД с версии N-1 на N (PRAGMA user_version). Новые
+# миграции только дописываются в конец. Первые шаги проверяют, что уже
+# есть, — их могли применить версии программы без учёта user_version.
+MIGRATIONS = [
+    migrate_base,
+    migrate_password_params,
+    migrate_image_refs,
+    migrate_books_fts,
+    migrate_sessions,
+    migrate_book_indexes,
+]
+
+def init_db():
+    """Применяет недостающие миграции; на актуальной БД — одно чтение user_version."""
+    conn = POOL.connection()
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= len(MIGRATIONS):
+        return
+    def migrate(conn):
+        # BEGIN IMMEDIATE: две копии программы не начнут миграцию одновременно
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.cursor()
+            version = cur.execute("PRAGMA user_version").fetchone()[0]
+            for number, step in enumerate(MIGRATIONS[version:], version + 1):
+                step(cur)
+                cur.execute(f"PRAGMA user_version = {number}")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+    with_retry(migrate, conn)
+
+class QueryWorker(QObject):
+    """Живёт в отдельном потоке со своим соединением и по очереди выполняет запросы (как в 2zadanie)."""
+
+    done = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
+    def __init__(self, pool):
+        super().__init__()
+        self.pool = pool
+        self.connection = None
+        self.current = None
+        self.cancelled = set()
+        # Запросы идут строго по возрастанию id: всё, что <= started, уже начато
+        self.started = 0
+        # current/connection/cancelled/started меняются в потоке БД, а читаются из GUI-потока в cancel
+        self.lock = threading.Lock()
+
+    @pyqtSlot(int, object, bool)
+    def run(self, request_id, fn, write):
+        with self.lock:
+            self.started = request_id
+            if request_id in self.cancelled:
+                self.cancelled.discard(request_id)
+                return
+        connection = self.pool.connection(readonly=not write)
+        with self.lock:
+            self.current, self.connection = request_id, connection
+        try:
+            result = with_retry(fn, connection) if write else fn(connection)
+            error = None
+        except Exception as e:
+            result, error = None, str(e)
+        with self.lock:
+            self.current = self.connection = None
+            cancelled = request_id in self.cancelled
+            self.cancelled.discard(request_id)
+        if error is not None and connection.in_transaction:
+            connection.rollback()
+        if cancelled:
+            return
+        if error is None:
+            self.done.emit(request_id, result)
+        else:
+            self.failed.emit(request_id, error)
+
+    def cancel(self, request_id):
+        """Вызывается из GUI-потока: помечает запрос отменённым и прерывает его, если он уже идёт."""
+        with self.lock:
+            if request_id > self.started:
+                self.cancelled.add(request_id)
+            elif request_id == self.current:
+                self.cancelled.add(request_id)
+                self.connection.interrupt()
+            # иначе запрос уже выполнен: его результат отбросит Database.forget
+
+    @pyqtSlot()
+    def close(self):
+        self.pool.close()
+        self.connection = None
+
+class Database(QObject):
+    """Очередь запросов к БД в фоновом потоке; результаты приходят в GUI-поток через сигналы.
+
+    submit(fn, on_done, on_error, channel): fn(connection) выполняется в потоке
+    БД, on_done(result) / on_error(message) вызываются в GUI-потоке. Новый
+    запрос в том же channel отменяет предыдущий (если тот ещё выполняется —
+    через connection.interrupt()). Чтение идёт через отдельное соединение
+    только для чтения, запись (write=True) — через писателя с повторами.
+    """
+
+    requested = pyqtSignal(int, object, bool)
+    closing = pyqtSignal()
+
+    def __init__(self, pool, parent=None):
+        super().__init__(parent)
+        self.thread = QThread(self)
+        self.worker = QueryWorker(pool)
+        self.worker.moveToThread(self.thread)
+        self.requested.connect(self.worker.run)
+        self.closing.connect(self.worker.close)
+        self.worker.done.connect(self.on_done)
+        self.worker.failed.connect(self.on_failed)
+        self.thread.start()
+        self.next_id = 0
+        self.callbacks = {}
+        self.channels = {}
+
+    def submit(self, fn, on_done=None, on_error=None, channel=None, write=False):
+        self.next_id += 1
+        request_id = self.next_id
+        if channel is not None:
+            self.cancel(channel)
+            self.channels[channel] = request_id
+        self.callbacks[request_id] = (on_done, on_error)
+        self.requested.emit(request_id, fn, write)
+        return request_id
+
+    def query(self, sql, params=(), on_done=None, on_error=None, channel=None, row=None):
+        """SELECT -> список строк (row — namedtuple-класс строк)."""
+        def read(conn):
+            cur = conn.cursor()
+            if row is not None:
+                cur.row_factory = lambda _, values: row(*values)
+            return cur.execute(sql, params).fetchall()
+        return self.submit(read, on_done, on_error, channel)
+
+    def execute(self, sql, params=(), on_done=None, on_error=None):
+        """Изменение с commit -> lastrowid."""
+        def write(conn):
+            cur = conn.execute(sql, params)
+            conn.commit()
+            return cur.lastrowid
+        return self.submit(write, on_done, on_error, write=True)
+
+    def cancel(self, channel):
+        request_id = self.channels.pop(channel, None)
+        if request_id is None or self.callbacks.pop(request_id, None) is None:
+            return
+        self.worker.cancel(request_id)
+
+    def on_done(self, request_id, result):
+        on_done, _ = self.forget(request_id)
+        if on_done is not None:
+            on_done(result)
+
+    def on_failed(self, request_id, message):
+        _, on_error = self.forget(request_id)
+        if on_error is not None:
+            on_error(message)
+
+    def forget(self, request_id):
+        for channel, rid in list(self.channels.items()):
+            if rid == request_id:
+                del self.channels[channel]
+        return self.callbacks.pop(request_id, (None, None))
+
+    def close(self):
+        self.callbacks.clear()
+        self.closing.emit()
+        self.thread.quit()
+        self.thread.wait()
 
 # ---------- Auth Dialog ----------
 class AuthDialog(QDialog):
@@ -108,26 +848,87 @@ class AuthDialog(QDialog):
         self.login_btn.clicked.connect(self.try_login)
         self.register_btn.clicked.connect(self.try_register)
         self.user_id = None
+        self.hasher = WorkerPool(self)
+        self.hasher.progress.connect(self.show_progress)
+        # Без пароля можно войти только под последним логином с сохранённой сессией
+        self.last_user = SESSIONS.last_user()
+        self.login_edit.textChanged.connect(self.update_password_hint)
+        if self.last_user:
+            self.login_edit.setText(self.last_user)
+            self.remember_check.setChecked(True)
+
+    def update_password_hint(self, username):
+        resumable = bool(self.last_user) and username.strip() == self.last_user
+        self.pwd_edit.setPlaceholderText("можно оставить пустым — сохранённая сессия" if resumable else "")
+        if resumable:
+            self.status_label.setText("Сохранённая сессия: поле пароля можно оставить пустым")
+        elif self.status_label.text().startswith("Сохранённая сессия"):
+            self.status_label.clear()
+
+    def show_progress(self, running):
+        busy = running > 0
+        self.login_btn.setEnabled(not busy)
+        self.register_btn.setEnabled(not busy)
+        if busy:
+            self.status_label.setText("Проверка пароля…")
+        elif self.status_label.text() == "Проверка пароля…":
+            self.status_label.clear()
+
+    def hash_failed(self, message):
+        QMessageBox.critical(self, "Ошибка", f"Не удалось вычислить хеш пароля: {message}")
+
+    def done(self, result):
+        self.hasher.close()
+        super().done(result)
 
     def try_login(self):
         username = self.login_edit.text().strip()
         password = self.pwd_edit.text()
+        if username and not password and username == self.last_user:
+            # Пустой пароль — вход по сохранённой сессии последнего пользователя
+            user_id = SESSIONS.resume(username)
+            if user_id is not None:
+                self.finish_login(user_id, username)
+                return
         if not username or not password:
             QMessageBox.warning(self, "Ошибка", "Введите логин и пароль")
             return
-        conn = get_conn(); cur = conn.cursor()
-        cur.execute("SELECT id, pwd_hash, salt FROM users WHERE username = ?", (username,))
-        row = cur.fetchone(); conn.close()
-        if not row:
+        user = POOL.query_one("SELECT id, username, pwd_hash, salt, algo, iterations FROM users "
+                              "WHERE username = ?", (username,), row=User)
+        if not user:
             QMessageBox.warning(self, "Ошибка", "Пользователь не найден")
             return
-        uid, db_hash, db_salt = row
-        calc, _ = hash_password(password, db_salt)
-        if calc == db_hash:
-            self.user_id = uid
-            self.accept()
-        else:
+        self.hasher.submit(check_login, password, user,
+                           on_done=lambda result: self.login_checked(user, result),
+                           on_error=self.hash_failed)
+
+    def login_checked(self, user, result):
+        ok, upgrade = result
+        if not ok:
             QMessageBox.warning(self, "Ошибка", "Неверный пароль")
+            return
+        if upgrade is not None:
+            pwd_hash, salt = upgrade
+            def rehash(conn):
+                with POOL.transaction():
+                    conn.execute("UPDATE users SET pwd_hash = ?, salt = ?, algo = ?, iterations = ? "
+                                 "WHERE id = ?", (pwd_hash, salt, HASH_ALGO, HASH_COST[HASH_ALGO], user.id))
+            try:
+                with_retry(rehash, POOL.connection())
+            except sqlite3.Error:
+                pass  # старый хеш остаётся рабочим, обновим при следующем входе
+        self.finish_login(user.id, user.username)
+
+    def finish_login(self, user_id, username):
+        try:
+            if self.remember_check.isChecked():
+                SESSIONS.issue(user_id, username)
+            else:
+                SESSIONS.forget(username)
+        except (OSError, sqlite3.Error) as e:
+            print("Session store error:", e)
+        self.user_id = user_id
+        self.accept()
 
     def try_register(self):
         username = self.login_edit.text().strip()
@@ -135,14 +936,26 @@ class AuthDialog(QDialog):
         if not username or not password:
             QMessageBox.warning(self, "Ошибка", "Введите логин и пароль")
             return
-        conn = get_conn(); cur = conn.cursor()
-        cur.execute("SELECT id FROM users WHERE username = ?", (username,))
-        if cur.fetchone():
+        if POOL.query_one("SELECT id FROM users WHERE username = ?", (username,)):
             QMessageBox.warning(self, "Ошибка", "Логин уже занят")
-            conn.close(); return
-        pwd_hash, salt = hash_password(password)
-        cur.execute("INSERT INTO users (username, pwd_hash, salt) VALUES (?, ?, ?)", (username, pwd_hash, salt))
-        conn.commit(); conn.close()
+            return
+        self.hasher.submit(hash_password, password,
+                           on_done=lambda result: self.registered(username, result),
+                           on_error=self.hash_failed)
+
+    def registered(self, username, result):
+        pwd_hash, salt = result
+        def register(conn):
+            with POOL.transaction():
+                conn.execute("INSERT INTO users (username, pwd_hash, salt, algo, iterations) "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             (username, pwd_hash, salt, HASH_ALGO, HASH_COST[HASH_ALGO]))
+        try:
+            with_retry(register, POOL.connection())
+        except sqlite3.IntegrityError:
+            # Логин успели занять, пока считался хеш
+            QMessageBox.warning(self, "Ошибка", "Логин уже занят")
+            return
         QMessageBox.information(self, "OK", "Пользователь создан. Войдите.")
 
 # как FilmDialog 
@@ -152,6 +965,7 @@ class BookDialog(QDialog):
         uic.loadUi(resource_path("book.ui"), self)
         self.book = book_data
         self.selected_file = None
+        self.workers = WorkerPool(self, 1)
         self.choose_btn.clicked.connect(self.choose_image)
         self.ok_btn.clicked.connect(self.on_ok)
         self.cancel_btn.clicked.connect(self.reject)
@@ -172,16 +986,13 @@ class BookDialog(QDialog):
                 else:
                     self.image_name_label.setText("(не выбрано)")
             if gid:
-                for i in range(self.genre_combo.count()):
-                    if int(self.genre_combo.itemData(i)) == int(gid):
-                        self.genre_combo.setCurrentIndex(i)
-                        break
+                pos = GENRES.index_of(gid)
+                if pos is not None:
+                    self.genre_combo.setCurrentIndex(pos)
 
     def load_genres(self):
         try:
-            conn = get_conn(); cur = conn.cursor()
-            cur.execute("SELECT id, title FROM genres ORDER BY title")
-            rows = cur.fetchall(); conn.close()
+            rows = GENRES.get()
             self.genre_combo.clear()
             for rid, title in rows:
                 self.genre_combo.addItem(title, rid)
@@ -203,31 +1014,233 @@ class BookDialog(QDialog):
         if not title or not author:
             QMessageBox.warning(self, "Ошибка", "Название и автор обязательны")
             return
-        image_rel = None
+        data = {"title": title, "author": author, "year": year, "genre": gid}
         if self.selected_file:
-            ext = os.path.splitext(self.selected_file)[1]
-            newname = f"{uuid.uuid4().hex}{ext}"
-            dst = resource_path(os.path.join(IMAGES_DIR, newname))
-            try:
-                shutil.copy2(self.selected_file, dst)
-                image_rel = os.path.join(IMAGES_DIR, newname)
-            except Exception as e:
-                QMessageBox.warning(self, "Ошибка", f"Не удалось сохранить изображение: {e}")
-                return
-        else:
-            if self.book and isinstance(self.book, tuple):
-                image_rel = self.book[5]
-        self.result = {"title": title, "author": author, "year": year, "genre": gid, "image_path": image_rel}
+            # Копирование большого файла — в пуле, окно не замирает
+            self.ok_btn.setEnabled(False)
+            self.image_name_label.setText("Копирование…")
+            self.workers.submit(store_image, self.selected_file,
+                                on_done=lambda rel: self.finish(data, rel),
+                                on_error=self.copy_failed)
+            return
+        image_rel = None
+        if self.book and isinstance(self.book, tuple):
+            image_rel = self.book[5]
+        self.finish(data, image_rel)
+
+    def finish(self, data, image_rel):
+        data["image_path"] = image_rel
+        self.result = data
         self.accept()
 
+    def copy_failed(self, message):
+        self.ok_btn.setEnabled(True)
+        self.image_name_label.setText(os.path.basename(self.selected_file))
+        QMessageBox.warning(self, "Ошибка", f"Не удалось сохранить изображение: {message}")
+
+    def done(self, result):
+        self.workers.close()
+        super().done(result)
+
+WORD_RE = re.compile(r"[^\W_]+")
+
+def fts_query(text):
+    """Строка поиска -> запрос FTS5: все слова, каждое как префикс.
+
+    Пунктуацию токенизатор FTS5 всё равно выбрасывает, поэтому берём только
+    буквы и цифры; без слов ("*", "-") — пустая строка, т. е. без фильтра.
+    """
+    words = WORD_RE.findall(text)
+    return " ".join(f'"{w}"*' for w in words)
+
+class BooksModel(QAbstractTableModel):
+    """Книги страницами по PAGE_SIZE в порядке id (как FilmsModel в 2zadanie).
+
+    Следующая страница читается по ключу (id > последнего) в фоновом
+    потоке, когда view до неё докрутит. После добавления, изменения и
+    удаления перечитывается одна строка. Колонка обложек рисует иконки
+    только для строк, которые view запрашивает, то есть видимых.
+
+    При поиске (set_search) показываются SEARCH_LIMIT лучших совпадений
+    из books_fts по рангу bm25, без подгрузки страниц. Ранжирование
+    считает bm25 для всех совпадений, и на коротком префиксе это долго,
+    поэтому сначала сразу показываются первые совпадения без ранга, а
+    затем их заменяет ранжированный список.
+    """
+
+    error = pyqtSignal(str)
+
+    HEADERS = ["id", "Название", "Автор", "Год", "Жанр"]
+    SELECT = """
+        SELECT b.id, b.title, b.author, b.year, g.title as genre, b.image_path
+        FROM books b
+        LEFT JOIN genres g ON b.genre = g.id
+    """
+
+    def __init__(self, db, thumbs=None, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.thumbs = thumbs
+        self.headers = self.HEADERS + (["Обложка"] if thumbs is not None else [])
+        self.generation = 0
+        self.pending = False
+        self.rows = []
+        self.at_end = False
+        self.search = ""
+
+    def set_search(self, text):
+        self.search = fts_query(text)
+        self.reload()
+
+    def reload(self):
+        self.db.cancel("books-page")
+        self.db.cancel("books-rank")
+        self.generation += 1
+        self.pending = False
+        self.beginResetModel()
+        self.rows = []
+        self.at_end = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.at_end or self.pending:
+            return
+        self.pending = True
+        generation = self.generation
+        if self.search:
+            query = self.search_query() + " LIMIT ?"
+            params = (self.search, SEARCH_LIMIT)
+        else:
+            query = self.SELECT + " WHERE b.id > ? ORDER BY b.id LIMIT ?"
+            params = (self.rows[-1][0] if self.rows else 0, PAGE_SIZE)
+        self.db.query(query, params, lambda page: self.add_page(generation, page),
+                      self.page_failed, channel="books-page")
+
+    def search_query(self):
+        return (self.SELECT.replace("FROM books b", "FROM books_fts f JOIN books b ON b.id = f.rowid")
+                + " WHERE books_fts MATCH ?")
+
+    def rank_search(self, generation):
+        self.db.query(self.search_query() + " ORDER BY f.rank LIMIT ?", (self.search, SEARCH_LIMIT),
+                      lambda rows: self.set_ranked(generation, rows),
+                      self.error.emit, channel="books-rank")
+
+    def set_ranked(self, generation, rows):
+        if generation != self.generation:
+            return
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+
+    def page_failed(self, message):
+        self.pending = False
+        self.at_end = True
+        self.error.emit(message)
+
+    def add_page(self, generation, page):
+        if generation != self.generation:
+            return
+        self.pending = False
+        if self.search:
+            self.rank_search(generation)
+        if self.search or len(page) < PAGE_SIZE:
+            self.at_end = True
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+            self.rows.extend(page)
+            self.endInsertRows()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.at_end and not self.pending
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        column = index.column()
+        if column < len(self.HEADERS):
+            if role == Qt.DisplayRole:
+                value = row[column]
+                return str(value) if value is not None else ""
+        elif role == Qt.DecorationRole and row[5]:
+            return self.thumbs.icon(image_file(row[5]), self.icon_ready)
+        return None
+
+    def icon_ready(self, src):
+        # Какие строки видимы, решает view: перерисуется только видимая часть колонки
+        if self.rows:
+            column = len(self.headers) - 1
+            self.dataChanged.emit(self.index(0, column), self.index(len(self.rows) - 1, column),
+                                  [Qt.DecorationRole])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def book_id(self, row):
+        return self.rows[row][0]
+
+    # Точечные правки после добавления/изменения/удаления; строки упорядочены по id
+
+    def find_row(self, book_id):
+        if self.search:
+            # Результаты поиска упорядочены по рангу, их не больше SEARCH_LIMIT
+            return next((i for i, row in enumerate(self.rows) if row[0] == book_id), None)
+        pos = bisect_left(self.rows, book_id, key=lambda r: r[0])
+        return pos if pos < len(self.rows) and self.rows[pos][0] == book_id else None
+
+    def refresh_book(self, book_id):
+        """Перечитывает одну книгу: новая вставляется, изменённая заменяется."""
+        if self.search:
+            # Ранг мог измениться — короткий поиск проще выполнить заново
+            self.reload()
+            return
+        generation = self.generation
+        self.db.query(self.SELECT + " WHERE b.id = ?", (book_id,),
+                      lambda rows: self.patch_row(generation, book_id, rows),
+                      self.error.emit)
+
+    def patch_row(self, generation, book_id, rows):
+        if generation != self.generation:
+            return
+        pos = self.find_row(book_id)
+        if not rows:
+            self.remove_book(book_id)
+        elif pos is not None:
+            self.rows[pos] = rows[0]
+            self.dataChanged.emit(self.index(pos, 0), self.index(pos, len(self.headers) - 1))
+        elif self.at_end or (self.rows and book_id < self.rows[-1][0]):
+            # Книги за последней загруженной страницей подтянет fetchMore
+            pos = bisect_left(self.rows, book_id, key=lambda r: r[0])
+            self.beginInsertRows(QModelIndex(), pos, pos)
+            self.rows.insert(pos, rows[0])
+            self.endInsertRows()
+
+    def remove_book(self, book_id):
+        pos = self.find_row(book_id)
+        if pos is None:
+            return
+        self.beginRemoveRows(QModelIndex(), pos, pos)
+        del self.rows[pos]
+        self.endRemoveRows()
+
 class Catalog(QMainWindow):
     def __init__(self):
         super().__init__()
         uic.loadUi(resource_path("main2.ui"), self)
-        ensure_storage()
-        init_db()
 
-        self.conn = get_conn()
+        # Запросы каталога — в фоновом потоке со своим соединением
+        self.db = Database(POOL, self)
+        self.workers = WorkerPool(self, THUMB_WORKERS)
+        self.thumbs = ThumbnailCache(self.workers)
 
         self.btnAdd = QPushButton("Добавить")
         self.btnEdit = QPushButton("Изменить")
@@ -236,7 +1249,18 @@ class Catalog(QMainWindow):
         self.btnEdit.clicked.connect(self.edit_book)
         self.btnDelete.clicked.connect(self.delete_book)
 
+        # Поиск по мере ввода: запрос уходит, когда пользователь перестал печатать
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Поиск по названию и автору")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY)
+        self.search_timer.timeout.connect(lambda: self.model.set_search(self.search_edit.text()))
+        self.search_edit.textChanged.connect(self.search_timer.start)
+
         bl = QHBoxLayout()
+        bl.addWidget(self.search_edit)
         bl.addWidget(self.btnAdd)
         bl.addWidget(self.btnEdit)
         bl.addWidget(self.btnDelete)
@@ -245,80 +1269,72 @@ class Catalog(QMainWindow):
         main_layout = self.centralWidget().layout()
         main_layout.insertWidget(0, container)
 
-        self.tableWidget.setSelectionBehavior(self.tableWidget.SelectRows)
-        self.tableWidget.setEditTriggers(self.tableWidget.NoEditTriggers)
+        self.model = BooksModel(self.db, self.thumbs if SHOW_COVERS else None, self)
+        self.model.error.connect(lambda msg:
+                                 QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить книги:\n{msg}"))
+        self.tableView.setModel(self.model)
+        self.tableView.setSelectionBehavior(self.tableView.SelectRows)
+        self.tableView.setEditTriggers(self.tableView.NoEditTriggers)
+        self.tableView.setIconSize(QSize(*ICON_SIZE))
+        self.tableView.verticalHeader().setDefaultSectionSize(ICON_SIZE[1] + 4)
 
         self.load_books()
 
-        self.tableWidget.cellDoubleClicked.connect(self.show_details)
+        self.tableView.doubleClicked.connect(lambda index: self.show_details(index.row(), index.column()))
 
     def load_books(self):
-        try:
-            cur = self.conn.cursor()
-            query = """
-                SELECT b.id, b.title, b.author, b.year, g.title as genre, b.image_path
-                FROM books b
-                LEFT JOIN genres g ON b.genre = g.id
-                ORDER BY b.id
-            """
-            cur.execute(query)
-            rows = cur.fetchall()
-            headers = ["id", "Название", "Автор", "Год", "Жанр"]
-            self.tableWidget.setColumnCount(len(headers))
-            self.tableWidget.setHorizontalHeaderLabels(headers)
-            self.tableWidget.setRowCount(len(rows))
-            for i, r in enumerate(rows):
-                for j, val in enumerate(r[:5]):
-                    item = QTableWidgetItem(str(val) if val is not None else "")
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                    self.tableWidget.setItem(i, j, item)
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить книги:\n{e}")
+        self.model.reload()
 
     def get_selected_book_id(self):
-        sel = self.tableWidget.selectedItems()
+        sel = self.tableView.selectionModel().selectedRows()
         if not sel:
             return None
-        row = sel[0].row()
-        item = self.tableWidget.item(row, 0)
-        return int(item.text()) if item else None
+        return self.model.book_id(sel[0].row())
 
     def add_book(self):
         dlg = BookDialog(self)
         if dlg.exec_() == QDialog.Accepted:
             data = dlg.result
-            try:
-                cur = self.conn.cursor()
-                cur.execute("INSERT INTO books (title, author, year, genre, image_path) VALUES (?, ?, ?, ?, ?)",
-                            (data["title"], data["author"], data["year"], data["genre"], data["image_path"]))
-                self.conn.commit()
-                self.load_books()
-                QMessageBox.information(self, "Успех", "Книга добавлена.")
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось добавить:\n{e}")
+            self.prepare_thumbnail(data["image_path"])
+            self.db.execute("INSERT INTO books (title, author, year, genre, image_path) VALUES (?, ?, ?, ?, ?)",
+                            (data["title"], data["author"], data["year"], data["genre"], data["image_path"]),
+                            on_done=lambda book_id: self.books_changed(book_id, "Книга добавлена."),
+                            on_error=lambda msg: QMessageBox.critical(self, "Ошибка", f"Не удалось добавить:\n{msg}"))
+
+    def prepare_thumbnail(self, image_rel):
+        # Миниатюра новой обложки готовится сразу, к первому открытию карточки
+        if image_rel:
+            self.thumbs.request(image_file(image_rel))
+
+    def books_changed(self, bid, message):
+        self.model.refresh_book(bid)
+        QMessageBox.information(self, "Успех", message)
+
+    def book_deleted(self, bid):
+        self.model.remove_book(bid)
+        QMessageBox.information(self, "Успех", "Книга удалена.")
 
     def edit_book(self):
         bid = self.get_selected_book_id()
         if bid is None:
             QMessageBox.warning(self, "Ошибка", "Выберите книгу для редактирования.")
             return
-        cur = self.conn.cursor()
-        cur.execute("SELECT id, title, author, year, genre, image_path FROM books WHERE id = ?", (bid,))
-        row = cur.fetchone()
-        if not row:
+        self.db.query("SELECT id, title, author, year, genre, image_path FROM books WHERE id = ?", (bid,),
+                      row=Book, on_done=lambda rows: self.book_loaded(bid, rows),
+                      on_error=lambda msg: QMessageBox.critical(self, "Ошибка", msg))
+
+    def book_loaded(self, bid, rows):
+        if not rows:
             QMessageBox.warning(self, "Ошибка", "Книга не найдена.")
             return
-        dlg = BookDialog(self, book_data=row)
+        dlg = BookDialog(self, book_data=rows[0])
         if dlg.exec_() == QDialog.Accepted:
             data = dlg.result
-            try:
-                cur.execute("UPDATE books SET title=?, author=?, year=?, genre=?, image_path=? WHERE id=?",
-                            (data["title"], data["author"], data["year"], data["genre"], data["image_path"], bid))
-                self.conn.commit()
-                self.load_books()
-                QMessageBox.information(self, "Успех", "Книга обновлена.")
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось обновить:\n{e}")
+            self.prepare_thumbnail(data["image_path"])
+            self.db.execute("UPDATE books SET title=?, author=?, year=?, genre=?, image_path=? WHERE id=?",
+                            (data["title"], data["author"], data["year"], data["genre"], data["image_path"], bid),
+                            on_done=lambda _: self.books_changed(bid, "Книга обновлена."),
+                            on_error=lambda msg: QMessageBox.critical(self, "Ошибка", f"Не удалось обновить:\n{msg}"))
 
     def delete_book(self):
         bid = self.get_selected_book_id()
@@ -328,46 +1344,53 @@ class Catalog(QMainWindow):
         reply = QMessageBox.question(self, "Подтвердите", "Удалить книгу?", QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.No:
             return
-        try:
-            cur = self.conn.cursor()
-            cur.execute("DELETE FROM books WHERE id = ?", (bid,))
-            self.conn.commit()
-            self.load_books()
-            QMessageBox.information(self, "Успех", "Книга удалена.")
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось удалить:\n{e}")
+        self.db.execute("DELETE FROM books WHERE id = ?", (bid,),
+                        on_done=lambda _: self.book_deleted(bid),
+                        on_error=lambda msg: QMessageBox.critical(self, "Ошибка", f"Не удалось удалить:\n{msg}"))
 
     def show_details(self, row, col):
-        id_item = self.tableWidget.item(row, 0)
-        if not id_item:
-            return
-        bid = int(id_item.text())
-        cur = self.conn.cursor()
-        cur.execute("SELECT title, author, year, genre, image_path FROM books WHERE id = ?", (bid,))
-        book = cur.fetchone()
-        if not book:
+        bid = self.model.book_id(row)
+        self.db.query("SELECT title, author, year, genre, image_path FROM books WHERE id = ?", (bid,),
+                      on_done=self.details_loaded, channel="details")
+
+    def details_loaded(self, rows):
+        if not rows:
             return
+        book = rows[0]
         title, author, year, genre_name, image_rel = book[0], book[1], book[2], book[3], book[4]
         txt = f"Название: {title}\nАвтор: {author}\nГод: {year}\nЖанр: {genre_name}"
         img_path = resource_path(os.path.join(IMAGES_DIR, PLACEHOLDER))
         if image_rel:
-            cand = resource_path(image_rel)
+            cand = image_file(image_rel)
             if os.path.exists(cand):
                 img_path = cand
-        pix = QPixmap(img_path).scaled(240, 320, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self.thumbs.request(img_path, on_done=lambda pix: self.show_book_card(txt, pix))
+
+    def show_book_card(self, txt, pix):
         msg = QMessageBox(self)
         msg.setWindowTitle("Информация о книге")
         msg.setText(txt)
-        msg.setIconPixmap(pix)
+        if pix is not None:
+            msg.setIconPixmap(pix)
         msg.exec_()
 
     def closeEvent(self, ev):
         try:
-            self.conn.close()
+            self.db.close()
+            self.workers.close()
+            GENRES.close()
+            POOL.close()
         finally:
             ev.accept()
 
 def main():
+    if "--gc" in sys.argv[1:]:
+        # python main.py --gc — удалить обложки, на которые не ссылается ни одна книга
+        ensure_storage()
+        init_db()
+        removed, freed = collect_garbage()
+        print(f"Удалено файлов: {removed}, освобождено {freed / 1024:.0f} КБ")
+        return
     app = QApplication(sys.argv)
     ensure_storage()
     init_db()